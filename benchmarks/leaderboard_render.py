@@ -0,0 +1,171 @@
+# compares the old leaderboard rendering (dict per score, SCORE_FORMAT
+# and flipping show_pp_for_personal_best on the config) with `render`
+# on a 100 score bancho leaderboard, both have to give the same bytes
+# run from the root of the repo: python -m benchmarks.leaderboard_render
+
+import timeit
+import random
+import tempfile
+from ext import glob
+from typing import Any
+from pathlib import Path
+from objects import Score
+from objects import Config
+from objects import Beatmap
+from objects import BanchoScore
+from objects import ReplayStore
+from objects.leaderboard import render
+from objects.leaderboard import RenderOptions
+from objects.leaderboard import VALID_LB_STATUESES
+from objects.leaderboard import STARTING_LB_FORMAT
+from objects.leaderboard import FROM_API_TO_SERVER_STATUS
+
+SCORE_FORMAT = (
+    "{score_id}|{username}|{score}|"
+    "{maxcombo}|{count50}|{count100}|"
+    "{count300}|{countmiss}|{countkatu}|"
+    "{countgeki}|{perfect}|{enabled_mods}|{user_id}|"
+    "{num_on_lb}|{time}|{replay_available}"
+)
+
+def bancho_fields(s: BanchoScore) -> dict[str, Any]:
+    _dict = s.__dict__.copy()
+    _dict['score'] = (
+        f"{_dict['pp']:.0f}"
+        if glob.config.pp_leaderboard and _dict['pp'] else
+        _dict['score']
+    )
+    del _dict['pp'], _dict['bmap']
+    return _dict
+
+def local_fields(s: Score) -> dict[str, Any]:
+    if s.scoreid and (s.replay_frames or s.replay_md5 in glob.replays):
+        sid = -s.scoreid
+    else:
+        sid = 0
+
+    pp_checks = (
+        glob.config.pp_leaderboard or
+        glob.mode or
+        glob.config.show_pp_for_personal_best
+    )
+
+    return {
+        'score_id': sid, 'username': s.name,
+        'score': int(s.pp or 0) if pp_checks else s.score,
+        'maxcombo': s.max_combo, 'count50': s.n50, 'count100': s.n100,
+        'count300': s.n300, 'countmiss': s.nmiss, 'countkatu': s.nkatu,
+        'countgeki': s.ngeki, 'perfect': int(s.perfect),
+        'enabled_mods': s.mods, 'user_id': 2, 'time': s.time,
+        'replay_available': 1 if sid != 0 else 0
+    }
+
+def fields(s: Any) -> dict[str, Any]:
+    if isinstance(s, BanchoScore):
+        return bancho_fields(s)
+
+    return local_fields(s)
+
+def old_render(bmap: Beatmap, scores: list, personal_score: Score) -> bytes:
+    r = FROM_API_TO_SERVER_STATUS[bmap.approved]
+    if r not in VALID_LB_STATUESES:
+        return f'{r}|false'.encode()
+
+    buffer = bytearray()
+    buffer += STARTING_LB_FORMAT.format(
+        rankedstatus = r,
+        mapid = bmap.beatmap_id,
+        setid = bmap.beatmapset_id,
+        num_of_scores = len(scores),
+        artist_unicode = bmap.artist_unicode or bmap.artist,
+        title_unicode = bmap.title_unicode or bmap.title
+    ).encode()
+
+    if personal_score not in scores:
+        num_on_lb = glob.config.amount_of_scores_on_lb + 1
+    else:
+        num_on_lb = scores.index(personal_score) + 1
+
+    buffer += SCORE_FORMAT.format(
+        **fields(personal_score), num_on_lb = num_on_lb
+    ).encode()
+    buffer += b'\n'
+
+    enabled = None
+    for idx, s in enumerate(scores, start = 1):
+        if idx == 1:
+            enabled = glob.config.show_pp_for_personal_best
+            glob.config.show_pp_for_personal_best = False
+
+        buffer += SCORE_FORMAT.format(**fields(s), num_on_lb = idx).encode()
+        if idx != len(scores):
+            buffer += b'\n'
+
+    if enabled:
+        glob.config.show_pp_for_personal_best = True
+
+    return bytes(buffer)
+
+def make_scores(amount: int) -> list:
+    scores: list = []
+    for i in range(amount):
+        s = BanchoScore({
+            'score_id': str(4000000000 + i), 'username': f'player {i}',
+            'score': str(random.randint(10**6, 10**8)), 'maxcombo': '1234',
+            'count50': '0', 'count100': str(random.randint(0, 30)),
+            'count300': '900', 'countmiss': str(random.randint(0, 3)),
+            'countkatu': '5', 'countgeki': '200', 'perfect': '0',
+            'enabled_mods': '72', 'user_id': str(1000 + i),
+            'date': '2021-04-01 12:00:00', 'replay_available': '1'
+        })
+        s.pp = random.uniform(200, 400)
+        scores.append(s)
+
+    scores.sort(key = lambda s: s.pp, reverse = True)
+    return scores
+
+def main() -> int:
+    random.seed(0)
+    glob.config = Config()
+    glob.mode = None
+
+    with tempfile.TemporaryDirectory() as folder:
+        glob.replays = ReplayStore(Path(folder))
+
+        bmap = Beatmap(
+            approved = 1, beatmap_id = 75, beatmapset_id = 1,
+            artist = 'Kenji Ninuma', artist_unicode = '',
+            title = 'DISCO PRINCE', title_unicode = ''
+        )
+        scores = make_scores(100)
+        personal_score = Score(
+            0, 'a' * 32, 'me', 900, 10, 0, 200, 5, 1,
+            12345678, 1200, False, 72, 1617278400,
+            pp = 250.0, scoreid = 3
+        )
+        scores.insert(50, personal_score)
+        scores.pop()
+
+        old = old_render(bmap, scores, personal_score)
+        new = render(bmap, scores, personal_score, RenderOptions.from_config())
+        if old != new:
+            print('renders are different!')
+            return 1
+
+        runs = 2000
+        old_time = timeit.timeit(
+            lambda: old_render(bmap, scores, personal_score), number = runs
+        )
+        new_time = timeit.timeit(
+            lambda: render(
+                bmap, scores, personal_score, RenderOptions.from_config()
+            ), number = runs
+        )
+
+    print(f'old: {old_time / runs * 1e6:.1f}us per leaderboard')
+    print(f'new: {new_time / runs * 1e6:.1f}us per leaderboard')
+    print(f'{old_time / new_time:.2f}x faster, {len(new)} identical bytes')
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+# compares the old eval() replay decoding with the decoders that
+# replaced it, and the first profile load (which moves inline
+# replays into the replay store) with the loads after it
+# run from the root of the repo: python -m benchmarks.replay_frames
+
+import os
+import time
+import base64
+import hashlib
+import timeit
+import tempfile
+from ext import glob # first, other modules import each other through it
+from pathlib import Path
+from database import Database
+from database import ProfileTable
+from objects.replaystore import ReplayStore
+from objects.replaystore import decode_repr
+from objects.replaystore import decode_base64
+
+PLAYS = 5000
+FRAMES_SIZE = 16 * 1024
+
+def make_profile(plays: int) -> dict:
+    all_plays = []
+    for scoreid in range(1, plays + 1):
+        frames = os.urandom(FRAMES_SIZE)
+        all_plays.append({
+            'md5': hashlib.md5(str(scoreid % 500).encode()).hexdigest(),
+            'pp': 100.0, 'acc': 98.0, 'mods': 0, 'scoreid': scoreid,
+            'replay_md5': hashlib.md5(frames).hexdigest(),
+            # how replays were saved before they were base64
+            'replay_frames': repr(frames)
+        })
+
+    return {
+        'pp': 0, 'acc': 0.0, 'playcount': plays,
+        'plays': {
+            'ranked_plays': {}, 'loved_plays': {},
+            'qualified_plays': {}, 'approved_plays': {},
+            'all_plays': all_plays
+        }
+    }
+
+def load_time(db: Database, replays: ReplayStore) -> float:
+    start = time.perf_counter()
+    ProfileTable(db, replays)
+    return time.perf_counter() - start
+
+def main() -> int:
+    frames = os.urandom(FRAMES_SIZE)
+    as_repr = repr(frames)
+    as_base64 = base64.b64encode(frames).decode()
+
+    for name, func, value in (
+        ('eval', eval, as_repr),
+        ('literal_eval', decode_repr, as_repr),
+        ('base64', decode_base64, as_base64)
+    ):
+        runs = 200
+        took = timeit.timeit(lambda: func(value), number = runs)
+        print(f'{name:>12}: {took / runs * 1e6:8.1f}us per replay')
+
+    with tempfile.TemporaryDirectory() as folder:
+        db = Database(Path(folder) / 'data.db')
+        with db.connection:
+            ProfileTable.write_profile(db.connection, 'bench', make_profile(PLAYS))
+
+        replays = ReplayStore(Path(folder) / 'replays')
+
+        print(f'first load ({PLAYS} inline replays): {load_time(db, replays):.2f}s')
+        for i in range(3):
+            print(f'load {i + 2}: {load_time(db, replays):.2f}s')
+
+        print(f'replays in the store: {len(replays.md5s)}')
+        db.close()
+
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+# compares the old linear router scan with the
+# compiled route table on the server's real routes
+# run from the root of the repo: python -m benchmarks.routes
+
+import timeit
+from ext import glob # first, other modules import each other through it
+from typing import Any
+from typing import Optional
+from server import Router
+from server import RouteTable
+
+def linear_match(
+    routers: list[Router], method: str, path: str
+) -> Optional[tuple[Any, dict]]:
+    for router in routers:
+        if not (match := router.match(path)):
+            continue
+
+        if isinstance(match, str):
+            route_path = path.removeprefix(match)
+        else:
+            route_path = path.removeprefix(router.main_destination) # type: ignore
+
+        for route in router:
+            if method not in route.methods:
+                continue
+
+            if (match := route.match(route_path)) is False:
+                continue
+
+            return (route, match if isinstance(match, dict) else {})
+
+def main() -> int:
+    import handlers
+    from website import website_handler
+
+    routers: list[Router] = [
+        handlers.api.api,
+        handlers.cho.cho,
+        handlers.web.web,
+        handlers.ava.avatar,
+        website_handler.website
+    ]
+    table = RouteTable(routers)
+
+    paths = [
+        '/osu/web/osu-osz2-getscores.php',
+        '/osu/web/osu-getreplay.php',
+        '/osu/web/osu-submit-modular-selector.php',
+        '/osu/web/osu-search.php',
+        '/osu/web/bancho_connect.php',
+        '/osu/web/d/1234',
+        '/osu/web/beatmapsets/1234',
+        '/api/v1/profile',
+        '/c/',
+        '/a/2',
+        '/favicon.ico',
+        '/not/a/route'
+    ]
+
+    for path in paths:
+        if linear_match(routers, 'GET', path) != table.match('GET', path):
+            print(f'mismatch for {path}!')
+            return 1
+
+    number = 20000
+    linear = timeit.timeit(
+        lambda: [linear_match(routers, 'GET', p) for p in paths],
+        number = number
+    )
+    compiled = timeit.timeit(
+        lambda: [table.match('GET', p) for p in paths],
+        number = number
+    )
+
+    lookups = number * len(paths)
+    print(f'linear scan: {linear / lookups * 1e6:.2f}us per lookup')
+    print(f'route table: {compiled / lookups * 1e6:.2f}us per lookup')
+    print(f'{linear / compiled:.1f}x faster')
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -277,8 +277,11 @@ async def change_config(key: str, value: str) -> None:
     else:
         key1, key2 = path
         glob.json_config[key1][key2] = value
+        glob.json_config.mark_dirty()
         glob.config.__dict__[key1][key2] = value
 
+    glob.leaderboards.clear()
+
     glob.player.queue += packets.notification( # type: ignore
         f'{path} was updated to {value}'
     )
@@ -0,0 +1,426 @@
+import orjson
+import sqlite3
+from typing import Any
+from pathlib import Path
+from typing import Optional
+from collections import UserDict
+from objects.replaystore import ReplayStore
+from objects.replaystore import decode_frames
+
+SCHEMA = """
+create table if not exists meta (
+    key text primary key,
+    value text
+);
+
+create table if not exists profiles (
+    name text primary key,
+    data blob not null
+);
+
+create table if not exists plays (
+    profile text not null,
+    scoreid integer not null,
+    md5 text not null,
+    status text,
+    replay_md5 text,
+    data blob not null,
+    primary key (profile, scoreid)
+);
+create index if not exists plays_md5 on plays (md5);
+create index if not exists plays_profile_md5 on plays (profile, md5);
+create index if not exists plays_replay_md5 on plays (replay_md5);
+
+create table if not exists beatmaps (
+    md5 text primary key,
+    beatmap_id integer,
+    data blob not null
+);
+create index if not exists beatmaps_id on beatmaps (beatmap_id);
+
+create table if not exists modified_beatmaps (
+    md5 text primary key,
+    data blob not null
+);
+
+create table if not exists difficulty (
+    md5 text not null,
+    mods integer not null,
+    aim real not null,
+    speed real not null,
+    primary key (md5, mods)
+);
+
+create table if not exists pfps (
+    name text primary key,
+    data blob
+);
+"""
+
+STATUSES = ('ranked', 'approved', 'qualified', 'loved')
+
+INSERT_PLAY = (
+    'insert or replace into plays (profile, scoreid, md5, status, replay_md5, data) '
+    'values (?, ?, ?, ?, ?, ?)'
+)
+
+def empty_plays() -> dict[str, Any]:
+    plays: dict[str, Any] = {
+        f'{status}_plays': {} for status in STATUSES
+    }
+    plays['all_plays'] = []
+    # kept as a set for duplicate checks, it's not stored
+    # anywhere as it's rebuilt from the plays table
+    plays['replay_md5'] = set()
+    return plays
+
+class Database:
+    """SQLite storage for everything that used to live in `.data/*.json`"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('pragma journal_mode = wal')
+        self.connection.execute('pragma synchronous = normal')
+        self.connection.executescript(SCHEMA)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute(
+            'select value from meta where key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Optional[str]) -> None:
+        """Sets a meta value, `None` removes it"""
+        with self.connection:
+            if value is None:
+                self.connection.execute('delete from meta where key = ?', (key,))
+            else:
+                self.connection.execute(
+                    'insert or replace into meta (key, value) values (?, ?)',
+                    (key, value)
+                )
+
+    @property
+    def migrated(self) -> bool:
+        return bool(self.get_meta('migrated'))
+
+    def migrate(self, data_folder: Path) -> None:
+        """One shot import of the old json files, they are left untouched"""
+        def load(name: str) -> dict:
+            path = data_folder / name
+            if not path.exists():
+                return {}
+
+            return orjson.loads(path.read_bytes() or b'{}') or {}
+
+        with self.connection:
+            self.connection.executemany(
+                'insert or replace into pfps (name, data) values (?, ?)',
+                [(k, orjson.dumps(v)) for k, v in load('pfps.json').items()]
+            )
+
+            self.connection.executemany(
+                'insert or replace into beatmaps (md5, beatmap_id, data) values (?, ?, ?)',
+                [
+                    (k, v.get('beatmap_id'), orjson.dumps(
+                        # .osu files are kept in `.data/osu` now
+                        {bk: bv for bk, bv in v.items() if bk != 'file_content'}
+                    ))
+                    for k, v in load('beatmaps.json').items()
+                    # beatmaps were stored under their id as well
+                    if v and not k.isdecimal()
+                ]
+            )
+
+            self.connection.executemany(
+                'insert or replace into modified_beatmaps (md5, data) values (?, ?)',
+                [(k, orjson.dumps(v)) for k, v in load('modified.json').items()]
+            )
+
+            for name, profile in load('profiles.json').items():
+                ProfileTable.write_profile(self.connection, name, profile)
+
+            self.connection.execute(
+                "insert or replace into meta (key, value) values ('migrated', '1')"
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+class Table(UserDict):
+    """In memory dict of a key/value table, only keys that
+    were set or deleted are written back on `update_file`"""
+
+    def __init__(self, db: Database, table: str, key: str = 'name') -> None:
+        self.db = db
+        self.table = table
+        self.key = key
+        self.dirty: set[str] = set()
+
+        super().__init__()
+        for k, data in db.connection.execute(
+            f'select {key}, data from {table}'
+        ):
+            self.data[k] = orjson.loads(data) if data is not None else None
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.data[key] = value
+        self.dirty.add(key)
+
+    def __delitem__(self, key: Any) -> None:
+        del self.data[key]
+        self.dirty.add(key)
+
+    def row(self, key: str, value: Any) -> tuple:
+        return (key, orjson.dumps(value))
+
+    def update_file(self) -> None:
+        if not self.dirty:
+            return
+
+        deleted = [(k,) for k in self.dirty if k not in self.data]
+        changed = [self.row(k, self.data[k]) for k in self.dirty if k in self.data]
+        self.dirty.clear()
+
+        placeholders = ', '.join('?' * (len(changed[0]) if changed else 0))
+        with self.db.connection:
+            if deleted:
+                self.db.connection.executemany(
+                    f'delete from {self.table} where {self.key} = ?', deleted
+                )
+
+            if changed:
+                self.db.connection.executemany(
+                    f'insert or replace into {self.table} values ({placeholders})',
+                    changed
+                )
+
+class BeatmapTable(Table):
+    """Beatmaps are looked up by md5 or by str(beatmap_id),
+    both keys point at the same row stored under its md5"""
+
+    def __init__(self, db: Database) -> None:
+        super().__init__(db, 'beatmaps', key = 'md5')
+
+        for bmap in list(self.data.values()):
+            if bmap and 'beatmap_id' in bmap:
+                self.data[str(bmap['beatmap_id'])] = bmap
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if str(key).isdecimal():
+            self.data[key] = value
+        else:
+            super().__setitem__(key, value)
+
+    def row(self, key: str, value: Any) -> tuple:
+        return (key, value.get('beatmap_id'), orjson.dumps(value))
+
+class ProfileTable(UserDict):
+    """Profiles keep the same nested dict layout they had in profiles.json,
+    plays are stored one row each and on `update_file` only plays appended
+    to `all_plays` since the last write are inserted"""
+
+    def __init__(
+        self, db: Database,
+        replays: Optional[ReplayStore] = None
+    ) -> None:
+        self.db = db
+        self.replays = replays
+
+        # name -> (profile dict, plays written, profile meta written)
+        self.persisted: dict[str, tuple[dict, int, bytes]] = {}
+
+        # plays that still had their replay inline get rewritten without
+        # it, profiles are only checked until that was done once
+        moved: dict[str, list[tuple[Optional[str], dict]]] = {}
+        migrated = set(orjson.loads(db.get_meta('replays_migrated') or b'[]'))
+
+        super().__init__()
+        for name, data in db.connection.execute('select name, data from profiles'):
+            profile = orjson.loads(data)
+            profile['plays'] = empty_plays()
+            self.data[name] = profile
+
+        for name, status, data in db.connection.execute(
+            'select profile, status, data from plays order by profile, scoreid'
+        ):
+            if name not in self.data:
+                continue
+
+            play = orjson.loads(data)
+            if name not in migrated and self.move_replay(play):
+                moved.setdefault(name, []).append((status, play))
+
+            plays = self.data[name]['plays']
+            plays['all_plays'].append(play)
+
+            if play.get('replay_md5'):
+                plays['replay_md5'].add(play['replay_md5'])
+
+            if status:
+                plays[f'{status}_plays'].setdefault(play['md5'], []).append(play)
+
+        for name, moved_plays in moved.items():
+            self.update_plays(name, moved_plays)
+
+        if self.replays and self.data.keys() - migrated:
+            db.set_meta('replays_migrated', orjson.dumps(
+                sorted(migrated | self.data.keys())
+            ).decode())
+
+        for name, profile in self.data.items():
+            self.persisted[name] = (
+                profile, len(profile['plays']['all_plays']), self.meta(profile)
+            )
+
+    def move_replay(self, play: dict) -> bool:
+        """Moves replay frames saved in `play` into the replay store"""
+        frames = play.get('replay_frames')
+        if not self.replays or not isinstance(frames, str):
+            return False
+
+        try:
+            raw_frames = decode_frames(frames)
+        except ValueError:
+            return False
+
+        if not self.replays.put(play.get('replay_md5'), raw_frames):
+            return False
+
+        del play['replay_frames']
+        return True
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.data[key]
+
+    @staticmethod
+    def meta(profile: dict) -> bytes:
+        return orjson.dumps({k: v for k, v in profile.items() if k != 'plays'})
+
+    @staticmethod
+    def status_of(profile: dict, play: dict) -> Optional[str]:
+        for status in STATUSES:
+            status_plays = profile['plays'].get(f'{status}_plays') or {}
+            if any(p is play for p in status_plays.get(play['md5'], ())):
+                return status
+
+        return
+
+    @staticmethod
+    def play_row(
+        name: str, scoreid: int,
+        status: Optional[str], play: dict
+    ) -> tuple:
+        return (
+            name, scoreid, play['md5'], status,
+            play.get('replay_md5'), orjson.dumps(play)
+        )
+
+    @classmethod
+    def write_profile(
+        cls, connection: sqlite3.Connection,
+        name: str, profile: dict
+    ) -> None:
+        """Writes a whole profile, replacing any plays it had before"""
+        connection.execute(
+            'insert or replace into profiles (name, data) values (?, ?)',
+            (name, cls.meta(profile))
+        )
+        connection.execute('delete from plays where profile = ?', (name,))
+
+        plays = profile.get('plays') or {}
+        all_plays: list[dict] = plays.get('all_plays') or []
+
+        # profiles.json kept a copy of each play in `all_plays` and
+        # another in its status' plays, the status one is the one
+        # recalc updates so that one is kept
+        rows: dict[int, tuple] = {}
+        by_replay: dict[str, int] = {}
+        for scoreid, play in enumerate(all_plays, start = 1):
+            # replays are looked up by their place in `all_plays`
+            if not play.get('scoreid'):
+                play['scoreid'] = scoreid
+
+            rows[scoreid] = cls.play_row(name, scoreid, None, play)
+            if play.get('replay_md5'):
+                by_replay[play['replay_md5']] = scoreid
+
+        unmatched = []
+        for status in STATUSES:
+            for md5_plays in (plays.get(f'{status}_plays') or {}).values():
+                for play in md5_plays:
+                    scoreid = play.get('scoreid')
+                    if (
+                        scoreid not in rows or
+                        rows[scoreid][4] != play.get('replay_md5')
+                    ):
+                        scoreid = by_replay.get(play.get('replay_md5')) # type: ignore
+
+                    if scoreid in rows and rows[scoreid][3] is None:
+                        play['scoreid'] = scoreid
+                        rows[scoreid] = cls.play_row(name, scoreid, status, play)
+                    else:
+                        unmatched.append((status, play))
+
+        for status, play in unmatched:
+            scoreid = len(rows) + 1
+            play['scoreid'] = scoreid
+            rows[scoreid] = cls.play_row(name, scoreid, status, play)
+
+        connection.executemany(INSERT_PLAY, rows.values())
+
+    def update_plays(
+        self, name: str,
+        plays: list[tuple[Optional[str], dict]]
+    ) -> None:
+        """Rewrites plays changed in place, like after recalculating them"""
+        with self.db.connection:
+            self.db.connection.executemany(INSERT_PLAY, [
+                self.play_row(name, play['scoreid'], status, play)
+                for status, play in plays
+            ])
+
+    def update_file(self) -> None:
+        with self.db.connection:
+            for name in self.persisted.keys() - self.data.keys():
+                del self.persisted[name]
+                self.db.connection.execute('delete from profiles where name = ?', (name,))
+                self.db.connection.execute('delete from plays where profile = ?', (name,))
+
+            for name, profile in self.data.items():
+                meta = self.meta(profile)
+                all_plays = profile['plays']['all_plays']
+
+                if name not in self.persisted:
+                    written_profile, written_plays, written_meta = None, 0, b''
+                else:
+                    written_profile, written_plays, written_meta = self.persisted[name]
+
+                # the profile was replaced (created or wiped)
+                if written_profile is not profile:
+                    self.write_profile(self.db.connection, name, profile)
+                    self.persisted[name] = (profile, len(all_plays), meta)
+                    continue
+
+                if meta != written_meta:
+                    self.db.connection.execute(
+                        'update profiles set data = ? where name = ?',
+                        (meta, name)
+                    )
+
+                new_plays = all_plays[written_plays:]
+                if new_plays:
+                    self.db.connection.executemany(INSERT_PLAY, [
+                        self.play_row(
+                            name, scoreid, self.status_of(profile, play), play
+                        )
+                        for scoreid, play in enumerate(
+                            new_plays, start = written_plays + 1
+                        )
+                    ])
+
+                self.persisted[name] = (profile, len(all_plays), meta)
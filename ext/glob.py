@@ -15,17 +15,38 @@ from objects.config import Config
 if TYPE_CHECKING:
     from objects.player import Player
     from objects.command import Command
+    from objects.recalculator import Recalculator
+    from database import Table
+    from database import Database
+    from database import BeatmapTable
+    from database import ProfileTable
     from objects.jsonfile import JsonFile
+    from objects.osucache import OsuFileCache
+    from objects.difficulty import DifficultyCache
+    from objects.topplays import TopPlaysIndex
+    from objects.personalbests import PersonalBestIndex
+    from objects.replaystore import ReplayStore
+    from objects.beatmapcache import BeatmapCache
+    from objects.apiclient import ApiClient
+    from objects.leaderboardcache import LeaderboardCache
 
 # config
 config = Config()
 json_config: 'JsonFile'
 
 # db
-pfps: 'JsonFile'
-beatmaps: 'JsonFile'
-profiles: 'JsonFile'
-modified_beatmaps: 'JsonFile'
+db: 'Database'
+pfps: 'Table'
+beatmaps: 'BeatmapTable'
+beatmap_info: 'BeatmapCache'
+profiles: 'ProfileTable'
+modified_beatmaps: 'Table'
+osu_files: 'OsuFileCache'
+difficulty: 'DifficultyCache'
+top_plays: 'TopPlaysIndex'
+personal_bests: 'PersonalBestIndex'
+leaderboards: 'LeaderboardCache'
+replays: 'ReplayStore'
 
 # paths
 modified_txt: Path
@@ -40,9 +61,11 @@ current_profile: dict[str, Any]
 player: Optional['Player'] = None
 invalid_mods: Mods = InvalidMods.Standard
 current_cmd: Optional['Command'] = None
+recalculator: Optional['Recalculator'] = None
 
 # services
 http: ClientSession
+api: 'ApiClient'
 http_server: HTTPServer
 imgur: Optional[Imgur] = None
 
@@ -1,19 +1,16 @@
 import utils
 import orjson
 import queries
-import asyncio
 from ext import glob
-from utils import log
-from utils import Color
 from objects import Mods
 from server import Alias
 from server import Query
-from objects import Score
 from server import Router
 from objects import Player
 from objects import Beatmap
 from typing import Optional
 import urllib.parse as urlparse
+from objects import Recalculator
 from objects import ModifiedBeatmap
 from server import SuccessJsonResponse
 
@@ -230,33 +227,13 @@ async def recent(
 
     return SuccessJsonResponse(response_json)
 
-async def _recalc(md5: str, score: Score) -> dict:
-    bmap = (
-        await ModifiedBeatmap.from_md5(md5) or
-        await Beatmap.from_md5(md5)
-    )
-
-    if (
-        not bmap or
-        not await bmap.get_file()
-    ):
-        score.pp = 0.0
-        return score.as_dict()
-
-    pp, acc = utils.calculator(score, bmap)
-
-    score.pp = pp
-    score.acc = acc
-    return score.as_dict()
-
-ACCEPTED_PLAYS = ('ranked_plays', 'approved_plays')
 @api.get('/recalc')
 async def recalc(
     name: str = Query(urlparse.unquote_plus, Alias('u'))
 ) -> SuccessJsonResponse:
-    
+
     if (
-        name != 'all' and 
+        name != 'all' and
         name not in glob.profiles
     ):
         return SuccessJsonResponse({
@@ -264,57 +241,37 @@ async def recalc(
             'message': 'invalid name'
         })
 
-    async def background_recalc() -> None:
-        if name == 'all':
-            profiles = glob.profiles
-        else:
-            profiles = [glob.profiles[name]]
-        
-        for index_of_profile, profile_name in enumerate(profiles):
-            log(
-                f'{index_of_profile}/{len(profiles)}', 'profiles calculated.',
-                color = Color.LIGHTMAGENTA_EX
-            )
-
-            profile = profiles[profile_name]
-
-            for index_of_type_plays, map_status in enumerate(ACCEPTED_PLAYS):
-                msg = (
-                    f"calculating {map_status[:-6]} maps of {profile_name}\n"
-                    f'{index_of_type_plays + 1}/2 calculated.'
-                )
-
-                log(msg, color = Color.LIGHTMAGENTA_EX)
-                plays: dict[str, list[dict]] = profile['plays'][map_status]
-
-                for index_of_maps, (md5, map_plays) in enumerate(plays.items()):
-                    for idx, play in enumerate(map_plays):
-                        map_plays[idx] = await _recalc(
-                            md5 = md5,
-                            score = Score.from_dict(
-                                play, ignore_binascii_errors = True
-                            )
-                        )
+    if glob.recalculator and glob.recalculator.running:
+        return SuccessJsonResponse({
+            'status': 'fail',
+            'message': 'profiles are already being calculated!',
+            'progress': glob.recalculator.as_dict()
+        })
 
-                        log(
-                            f'{idx+1}/{len(map_plays)}',
-                            'plays in this map calculated.',
-                            color = Color.LIGHTMAGENTA_EX
-                        )
+    glob.recalculator = Recalculator(name)
+    glob.recalculator.start()
 
-                    log(
-                        f'{index_of_maps + 1}/{len(plays.values())}',
-                        'maps calculated.', color = Color.LIGHTMAGENTA_EX
-                    )
+    if glob.recalculator.done_md5s:
+        message = 'Resuming the last calculation!'
+    else:
+        message = 'All profiles are being calculated!'
 
-        log('finished recalcing!', color = Color.LIGHTMAGENTA_EX)
-        utils.update_files()
+    return SuccessJsonResponse({
+        'status': 'success!',
+        'message': message
+    })
 
-    asyncio.create_task(background_recalc())
+@api.get('/recalc/status')
+async def recalc_status() -> SuccessJsonResponse:
+    if not glob.recalculator:
+        return SuccessJsonResponse({
+            'status': 'fail',
+            'message': 'nothing is being calculated!'
+        })
 
     return SuccessJsonResponse({
         'status': 'success!',
-        'message': 'All profiles are being calculated!'
+        'progress': glob.recalculator.as_dict()
     })
 
 @api.get('/api/v1/wipe')
@@ -351,6 +308,7 @@ async def wipe_profile(
     glob.profiles.update(
         queries.init_profile(name)
     )
+    glob.leaderboards.clear()
 
     utils.update_files()
 
@@ -8,6 +8,7 @@ from objects import Score
 from objects import Beatmap
 from typing import Optional
 from objects import ModifiedBeatmap
+from objects.topplays import ACCEPTED_PLAYS
 
 RANKED_PLAYS = dict[str, list[dict]]
 
@@ -99,6 +100,13 @@ async def score_submit(score: Score) -> None:
 
     score.scoreid = len(all_plays) + 1
 
+    # plays only keep their replay_md5, frames are stored separately
+    if (
+        score.replay_frames and
+        glob.replays.put(score.replay_md5, score.replay_frames)
+    ):
+        score.replay_frames = None
+
     score_dict = score.as_dict()
     all_plays.append(score_dict)
 
@@ -115,14 +123,20 @@ async def score_submit(score: Score) -> None:
     else:
         type_plays[score.md5].append(score_dict)
 
-    replay_md5s: Optional[list[str]] = \
+    glob.personal_bests.add(glob.current_profile, key, score_dict)
+    if key in ACCEPTED_PLAYS:
+        glob.top_plays.add(glob.current_profile, score_dict)
+
+    glob.leaderboards.invalidate(score.md5)
+
+    replay_md5s: Optional[set[str]] = \
     glob.current_profile['plays']['replay_md5']
 
     if replay_md5s is None:
         return
 
     if score.replay_md5:
-        replay_md5s.append(score.replay_md5)
+        replay_md5s.add(score.replay_md5)
 
     utils.update_files()
     await glob.player.update(glob.mode)
@@ -17,6 +17,7 @@ from typing import Union
 from server import Router
 from utils import log_error
 from server import Response
+from server import FileResponse
 from utils import log_success
 import urllib.parse as urlparse
 from objects import Leaderboard
@@ -26,6 +27,7 @@ from constants import ParsedParams
 from objects import DirectResponse
 from objects import LeaderboardTypes
 from objects import ModifiedLeaderboard
+from objects.replaystore import decode_frames
 
 web = Router((
     '/osu/web', '/osu' # type: ignore
@@ -163,28 +165,37 @@ async def get_replay(
             's': scoreid,
             'm': mode
         }
-        async with glob.http.get(
+        json = await glob.api.get_json(
             url = f'{OSU_API_BASE}/get_replay',
             params = params
-        ) as resp:
-            if not resp or resp.status != 200:
-                return Response(b'error: no')
+        )
 
-            json = await resp.json()
+        if not json:
+            return Response(b'error: no')
 
         replay_frames = utils.string_to_bytes(json["content"])
         log('bancho replay handled', color = Color.LIGHTGREEN_EX)
         return Response(replay_frames)
 
     elif (glob.player and glob.current_profile):
-        real_id = abs(scoreid) - 1
-        play = glob.current_profile['plays']['all_plays'][real_id].copy()
+        play = utils.get_play(glob.current_profile, abs(scoreid))
+
+        if (
+            play and
+            (path := glob.replays.path(play.get('replay_md5')))
+        ):
+            log(
+                f"{glob.player.name}'s replay was handled",
+                color = Color.LIGHTGREEN_EX
+            )
+            return FileResponse(path)
 
         if (
+            not play or
             'replay_frames' not in play or
             play['replay_frames'] is None
         ):
-            log_error(f'no replay frames were found for scoreid: {real_id}')
+            log_error(f'no replay frames were found for scoreid: {abs(scoreid)}')
             return Response(b'error: no')
         else:
             log(
@@ -192,10 +203,11 @@ async def get_replay(
                 color = Color.LIGHTGREEN_EX
             )
 
-            if "b\'" == play['replay_frames'][:2]:
-                replay: bytes = eval(play["replay_frames"])
-            else:
-                replay = utils.string_to_bytes(play['replay_frames'])
+            try:
+                replay = decode_frames(play['replay_frames'])
+            except ValueError:
+                log_error(f'replay frames for scoreid: {abs(scoreid)} are broken')
+                return Response(b'error: no')
 
             return Response(replay)
     else:
@@ -219,7 +231,8 @@ async def leaderboard(
     valid_rank_types = (
         LeaderboardTypes.LOCAL, 
         LeaderboardTypes.TOP, 
-        LeaderboardTypes.MODS
+        LeaderboardTypes.MODS,
+        LeaderboardTypes.COUNTRY
     )
 
     supported = (
@@ -271,7 +284,14 @@ async def leaderboard(
         )
         asyncio.create_task(glob.player.update(glob.mode))
 
-    if glob.config.osu_api_key:
+    cache_key = glob.leaderboards.key(parsed_params)
+    if (body := glob.leaderboards.get(cache_key)) is not None:
+        return Response(body)
+
+    if rank_type == LeaderboardTypes.COUNTRY:
+        # every profile on this server instead of bancho
+        lb = await Leaderboard.from_profiles(parsed_params)
+    elif glob.config.osu_api_key:
         lb = await Leaderboard.from_bancho(parsed_params)
     else:
         lb = await Leaderboard.from_offline(parsed_params)
@@ -300,7 +320,9 @@ async def leaderboard(
     else:
         log_success(f'handled map of setid: {setid}')
 
-    return Response(lb.as_binary)
+    body = lb.as_binary
+    glob.leaderboards.add(cache_key, body)
+    return Response(body)
 
 DIRECT_TO_API_STATUS = {
     0: 'ranked',
@@ -7,24 +7,38 @@
 import sys
 import subprocess
 
-print('ensuring all needed packages are installed!')
-subprocess.run(
-    f'{sys.executable} -m pip install -r requirements.txt',
-    stdin = subprocess.DEVNULL,
-    stderr = subprocess.DEVNULL,
-    stdout = subprocess.DEVNULL
-)
-
-import os
+# recalc's process pool workers import this file again
+# (as __mp_main__) when processes are spawned, skip it there
+if __name__ == '__main__':
+    print('ensuring all needed packages are installed!')
+    subprocess.run(
+        f'{sys.executable} -m pip install -r requirements.txt',
+        stdin = subprocess.DEVNULL,
+        stderr = subprocess.DEVNULL,
+        stdout = subprocess.DEVNULL
+    )
+
 import orjson
 import updater
 import pyimgur
-import asyncio
 from ext import glob
+import utils
 from pathlib import Path
 from objects import Config
 from utils import NONE_FILE
+from database import Table
+from database import Database
 from objects import JsonFile
+from objects import ApiClient
+from objects import OsuFileCache
+from objects import ReplayStore
+from objects import BeatmapCache
+from objects import TopPlaysIndex
+from objects import PersonalBestIndex
+from objects import LeaderboardCache
+from objects import DifficultyCache
+from database import BeatmapTable
+from database import ProfileTable
 from server import HTTPServer
 from utils import log_success
 from utils import setup_config
@@ -35,6 +49,7 @@ glob.http_server = http_server = HTTPServer()
 @http_server.starting
 async def on_start_up() -> None:
     glob.http = ClientSession()
+    glob.api = ApiClient()
 
     data_folder = Path.cwd() / '.data'
     if not data_folder.exists():
@@ -44,9 +59,6 @@ async def on_start_up() -> None:
     if config_path.exists():
         print('config found!')
         glob.config = Config.from_path(config_path)
-        if glob.config.__dict__.keys() != Config().__dict__.keys():
-            print('config was updated! please redo config')
-            glob.config = setup_config()
     else:
         glob.config = setup_config()
         config_path.write_bytes(
@@ -104,10 +116,22 @@ async def on_start_up() -> None:
     if glob.songs_folder:
         glob.modified_txt = glob.songs_folder / 'modified_mp3_list.txt'
     
-    glob.pfps = JsonFile(data_folder / 'pfps.json')
-    glob.beatmaps = JsonFile(data_folder / 'beatmaps.json')
-    glob.profiles = JsonFile(data_folder / 'profiles.json')
-    glob.modified_beatmaps = JsonFile(data_folder / 'modified.json')
+    glob.db = Database(data_folder / 'local.db')
+    if not glob.db.migrated:
+        print('moving your json databases over to sqlite!')
+        glob.db.migrate(data_folder)
+
+    glob.pfps = Table(glob.db, 'pfps')
+    glob.beatmaps = BeatmapTable(glob.db)
+    glob.beatmap_info = BeatmapCache()
+    glob.replays = ReplayStore(data_folder / 'replays')
+    glob.profiles = ProfileTable(glob.db, glob.replays)
+    glob.modified_beatmaps = Table(glob.db, 'modified_beatmaps', key = 'md5')
+    glob.osu_files = OsuFileCache(data_folder / 'osu')
+    glob.difficulty = DifficultyCache(glob.db)
+    glob.top_plays = TopPlaysIndex()
+    glob.personal_bests = PersonalBestIndex()
+    glob.leaderboards = LeaderboardCache()
 
     async with glob.http.get('https://a.ppy.sh/') as resp:
         if not resp or resp.status != 200:
@@ -122,6 +146,13 @@ async def on_start_up() -> None:
 @http_server.shutdown
 async def shutdown_method() -> None:
     await glob.http.close()
+
+    if glob.recalculator:
+        glob.recalculator.flush()
+
+    utils.update_files()
+    await glob.json_config.flush()
+    glob.db.close()
     log_success((
         'server successfully shutdown!\n'
         'see you next time :)'
@@ -130,36 +161,27 @@ async def shutdown_method() -> None:
 async def check_for_score_sub() -> None:
     from objects import Score
     from handlers import score_submit
+    from objects import ReplayWatcher
 
     if not glob.replay_folder.exists():
         print(
             "replay folder doesn't exist\n"
             "please restart server to have score sub working."
         )
-    
-    timestamp = lambda: glob.replay_folder.stat().st_mtime # type: ignore
-    last_changed = timestamp()
+        return
 
-    while await asyncio.sleep(0.1, result=True):
+    async for replays in ReplayWatcher(glob.replay_folder):
         if not glob.player:
             continue
-        
-        if last_changed == (time_changed := timestamp()):
-            continue
-
-        last_changed = time_changed
 
-        replay: Path = glob.replay_folder / max( # type: ignore
-            glob.replay_folder.glob('*.osr'), # type: ignore
-            key = os.path.getctime
-        )
-
-        if not replay.exists():
-            print("replay file doesn't exist!")
+        for replay in replays:
+            if not replay.exists():
+                print("replay file doesn't exist!")
+                continue
 
-        await score_submit(
-            Score.from_replay(replay)
-        )
+            await score_submit(
+                Score.from_replay(replay)
+            )
 
 def main() -> int:
     import handlers # load all handlers
@@ -11,7 +11,17 @@ from .jsonfile import JsonFile
 from .score import BanchoScore
 from .leaderboard import Leaderboard
 from .leaderboard import NotSupported
+from .leaderboardcache import LeaderboardCache
 from .directresponse import DirectResponse
 from .modifiedbeatmap import ModifiedBeatmap
 from .leaderboardtypes import LeaderboardTypes
+from .osucache import OsuFileCache
+from .topplays import TopPlaysIndex
+from .personalbests import PersonalBestIndex
+from .difficulty import DifficultyCache
+from .recalculator import Recalculator
+from .replaystore import ReplayStore
+from .beatmapcache import BeatmapCache
+from .apiclient import ApiClient
+from .replaywatcher import ReplayWatcher
 from .modifiedleaberboard import ModifiedLeaderboard
\ No newline at end of file
@@ -0,0 +1,74 @@
+import time
+import asyncio
+from ext import glob
+from typing import Any
+from typing import Optional
+
+REQUEST_KEY = tuple[str, tuple[tuple[str, str], ...]]
+
+class ApiClient:
+    """json GETs through `glob.http`, identical requests (same url and
+    params) that are in flight at the same time share one response and
+    responses can be reused for `ttl` seconds"""
+
+    def __init__(self, max_cached: int = 256) -> None:
+        self.max_cached = max_cached
+
+        self.cache: dict[REQUEST_KEY, tuple[float, Any]] = {}
+        self.pending: dict[REQUEST_KEY, asyncio.Task] = {}
+
+    @staticmethod
+    def key(url: str, params: dict[str, Any]) -> REQUEST_KEY:
+        return (url, tuple(sorted(
+            (k, str(v)) for k, v in params.items()
+        )))
+
+    async def request(
+        self, key: REQUEST_KEY, url: str,
+        params: dict[str, Any], ttl: float
+    ) -> Optional[Any]:
+        async with glob.http.get(url = url, params = params) as resp:
+            if not resp or resp.status != 200:
+                return
+
+            json = await resp.json()
+
+        if ttl > 0:
+            now = time.monotonic()
+            if len(self.cache) >= self.max_cached:
+                self.cache = {
+                    k: v for k, v in self.cache.items() if v[0] > now
+                }
+
+            if len(self.cache) < self.max_cached:
+                self.cache[key] = (now + ttl, json)
+
+        return json
+
+    async def get_json(
+        self, url: str,
+        params: Optional[dict[str, Any]] = None,
+        ttl: float = 0
+    ) -> Optional[Any]:
+        """Parsed json of the response, `None` if it wasn't a 200,
+        the result is shared so it shouldn't be changed in place"""
+        params = params or {}
+        key = self.key(url, params)
+
+        if key in self.cache:
+            expires, json = self.cache[key]
+            if expires > time.monotonic():
+                return json
+
+            del self.cache[key]
+
+        if key not in self.pending:
+            task = asyncio.create_task(self.request(key, url, params, ttl))
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+            self.pending[key] = task
+
+        # one caller giving up shouldn't cancel it for the others
+        return await asyncio.shield(self.pending[key])
+
+    def clear(self) -> None:
+        self.cache.clear()
@@ -1,13 +1,14 @@
 import utils
+import asyncio
+import hashlib
 import functools
 from ext import glob
 from typing import Any
 from typing import Union
+from typing import Literal
 import pyttanko as oppai
 from typing import Optional
 
-parser = oppai.parser()
-
 BMAP_DICT = dict[str, Any]
 OSU_API_BASE = 'https://osu.ppy.sh/api'
 
@@ -74,33 +75,55 @@ class Beatmap:
 
     def as_dict(self) -> dict:
         return utils.delete_keys(
-            self.__dict__.copy(), 'map_file'
+            self.__dict__.copy(), 'map_file', 'file_content'
         )
 
     @functools.cached_property
     def map_file(self) -> oppai.beatmap:
-        return parser.map(
-            osu_file = self.file_content.splitlines() # type: ignore
+        return glob.difficulty.beatmap(
+            self.file_md5, self.file_content # type: ignore
         )
 
+    def from_songs_folder(self) -> Optional[bytes]:
+        if glob.songs_folder == utils.NONE_FILE:
+            return
+
+        for folder in glob.songs_folder.glob(f'{self.beatmapset_id} *'):
+            for path in folder.glob('*.osu'):
+                content = path.read_bytes()
+                if hashlib.md5(content).hexdigest() == self.file_md5:
+                    return content
+
+        return
+
     async def get_file(self) -> Optional[str]:
         if 'file_content' in self.__dict__:
             return self.file_content
 
-        url = f'https://osu.ppy.sh/osu/{self.beatmap_id}'
-        async with glob.http.get(url) as resp:
-            if not resp or resp.status != 200:
-                return
+        content = glob.osu_files.get(self.file_md5)
+        if not content:
+            # globs the set's folder and hashes every
+            # .osu in it, so it's kept off the event loop
+            content = await asyncio.get_running_loop().run_in_executor(
+                None, self.from_songs_folder
+            )
+
+        if not content:
+            url = f'https://osu.ppy.sh/osu/{self.beatmap_id}'
+            async with glob.http.get(url) as resp:
+                if not resp or resp.status != 200:
+                    return
 
-            content = (
-                await resp.content.read()
-            ).decode(errors='ignore')
+                content = await resp.content.read()
 
             if not content:
                 return
 
-            self.file_content = content
-            return content
+        if self.file_md5 not in glob.osu_files:
+            glob.osu_files.put(self.file_md5, content)
+
+        self.file_content = content.decode(errors='ignore')
+        return self.file_content
 
     @property
     def in_db(self) -> bool:
@@ -136,61 +159,41 @@ class Beatmap:
         return bmap
 
     @classmethod
-    async def from_id(cls, bmap_id: int) -> Optional['Beatmap']:
-        if bmap_id in glob.beatmaps:
-            return cls.from_db(bmap_id)
-
-        if not glob.config.osu_api_key:
-            return None
-
-        params = {
-            'k': glob.config.osu_api_key,
-            'b': bmap_id
-        }
-        async with glob.http.get(
+    async def from_api(
+        cls, params: dict[str, Any]
+    ) -> Union[BMAP_DICT, None, Literal[False]]:
+        """`None` when the api doesn't know the map, `False` if it failed"""
+        json = await glob.api.get_json(
             url = f'{OSU_API_BASE}/get_beatmaps',
-            params = params
-        ) as resp:
-            if not resp or resp.status != 200:
-                return
-
-            if not (json := await resp.json()):
-                return
+            params = {'k': glob.config.osu_api_key, **params}
+        )
 
-            bmap_json: dict = json[0]
+        if json is None:
+            return False
 
-        bmap = cls()
-        for k, v in bmap_json.items():
-            bmap.__dict__[k] = real_type(v)
+        if not json:
+            return None
 
-        return bmap
+        return {k: real_type(v) for k, v in json[0].items()}
 
     @classmethod
-    async def from_md5(cls, md5: str) -> Optional['Beatmap']:
-        if md5 in glob.beatmaps:
-            return cls.from_db(md5)
+    async def from_id(cls, bmap_id: int) -> Optional['Beatmap']:
+        bmap_dict = await glob.beatmap_info.get(
+            bmap_id, lambda: cls.from_api({'b': bmap_id})
+        )
 
-        if not glob.config.osu_api_key:
+        if not bmap_dict:
             return None
 
-        params = {
-            'k': glob.config.osu_api_key,
-            'h': md5
-        }
-        async with glob.http.get(
-            url = f'{OSU_API_BASE}/get_beatmaps',
-            params = params
-        ) as resp:
-            if not resp or resp.status != 200:
-                return
-
-            if not (json := await resp.json()):
-                return
+        return cls.from_dict(bmap_dict)
 
-            bmap_json: dict = json[0]
+    @classmethod
+    async def from_md5(cls, md5: str) -> Optional['Beatmap']:
+        bmap_dict = await glob.beatmap_info.get(
+            md5, lambda: cls.from_api({'h': md5})
+        )
 
-        bmap = cls()
-        for k, v in bmap_json.items():
-            bmap.__dict__[k] = real_type(v)
+        if not bmap_dict:
+            return None
 
-        return bmap
\ No newline at end of file
+        return cls.from_dict(bmap_dict)
@@ -0,0 +1,119 @@
+import time
+import asyncio
+from ext import glob
+from typing import Any
+from typing import Union
+from typing import Literal
+from typing import Callable
+from typing import Optional
+from typing import Awaitable
+from collections import OrderedDict
+
+BMAP_DICT = dict[str, Any]
+FETCH = Callable[[], Awaitable[Union[BMAP_DICT, None, Literal[False]]]]
+
+# ranked and approved maps don't change status anymore
+FINAL_STATUSES = (1, 2)
+
+class BeatmapCache:
+    """Beatmap metadata from the osu! api keyed like `glob.beatmaps`
+    (md5 or str(beatmap_id)), maps that can still change status are
+    looked up again after `ttl` seconds, maps the api doesn't know
+    are remembered for `missing_ttl` seconds and lookups of a key
+    that is already being fetched wait for that request, at most
+    `max_entries` keys are kept with the least recently used dropped"""
+
+    def __init__(
+        self, ttl: float = 30 * 60,
+        missing_ttl: float = 10 * 60,
+        max_entries: int = 4096
+    ) -> None:
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.max_entries = max_entries
+
+        # key -> (expires at, beatmap or None when the api had nothing)
+        self.entries: OrderedDict[
+            str, tuple[float, Optional[BMAP_DICT]]
+        ] = OrderedDict()
+        self.pending: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key(value: Any) -> str:
+        return str(value).lower()
+
+    def cached(self, key: str) -> tuple[bool, Optional[BMAP_DICT]]:
+        if key in self.entries:
+            expires, bmap = self.entries[key]
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                return True, bmap
+
+            del self.entries[key]
+
+        stored = glob.beatmaps.get(key)
+        if stored and stored.get('approved') in FINAL_STATUSES:
+            return True, stored
+
+        return False, None
+
+    def store(self, key: str, entry: tuple[float, Optional[BMAP_DICT]]) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+
+    def add(self, key: str, bmap: Optional[BMAP_DICT]) -> None:
+        now = time.monotonic()
+        if not bmap:
+            self.store(key, (now + self.missing_ttl, None))
+            return
+
+        if bmap.get('approved') in FINAL_STATUSES:
+            expires = float('inf')
+        else:
+            expires = now + self.ttl
+
+        md5 = bmap.get('file_md5')
+        for bmap_key in (key, md5, bmap.get('beatmap_id')):
+            if bmap_key is not None:
+                self.store(self.key(bmap_key), (expires, bmap))
+
+        # maps played before keep their status up to date
+        if md5 in glob.beatmaps:
+            stored = {**glob.beatmaps[md5], **bmap}
+            glob.beatmaps[md5] = stored
+            glob.beatmaps[str(bmap['beatmap_id'])] = stored
+
+    async def fetch(self, key: str, fetch: FETCH) -> Optional[BMAP_DICT]:
+        bmap = await fetch()
+        if bmap is False:
+            # api errors aren't remembered, an old copy is better than none
+            return glob.beatmaps.get(key)
+
+        self.add(key, bmap or None)
+        return bmap or None
+
+    async def get(self, value: Any, fetch: FETCH) -> Optional[BMAP_DICT]:
+        """`fetch` returns the beatmap, `None` if the api doesn't
+        know it or `False` if the request itself failed"""
+        key = self.key(value)
+
+        found, bmap = self.cached(key)
+        if found:
+            return bmap
+
+        if not glob.config.osu_api_key:
+            return glob.beatmaps.get(key)
+
+        if key not in self.pending:
+            task = asyncio.create_task(self.fetch(key, fetch))
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+            self.pending[key] = task
+
+        # one caller giving up shouldn't cancel it for the others
+        return await asyncio.shield(self.pending[key])
+
+    def clear(self) -> None:
+        self.entries.clear()
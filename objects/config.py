@@ -34,6 +34,8 @@ class Config:
         self.command_prefix: str = '!'
         self.show_pp_for_personal_best: bool = True
         self.amount_of_scores_on_lb: int = 100
+        self.api_cache_seconds: int = 10
+        self.leaderboard_cache_seconds: int = 60
 
         self.auto_update: bool = True
         self.disable_funorange_maps: bool = False
@@ -48,6 +50,14 @@ class Config:
     
     @classmethod
     def from_path(cls, path: Path) -> 'Config':
-        return cls(
-            **(orjson.loads(path.read_bytes()) or {})
-        )
\ No newline at end of file
+        """Settings missing from the file (like ones added in an
+        update) get their defaults and ones that no longer exist
+        are dropped, the file is rewritten when either happens"""
+        saved = orjson.loads(path.read_bytes()) or {}
+        defaults = cls().__dict__
+        config = cls(**{k: v for k, v in saved.items() if k in defaults})
+
+        if config.__dict__.keys() != saved.keys():
+            path.write_bytes(orjson.dumps(config.__dict__))
+
+        return config
\ No newline at end of file
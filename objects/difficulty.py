@@ -0,0 +1,103 @@
+import pyttanko as oppai
+from typing import Optional
+from typing import NamedTuple
+from typing import TYPE_CHECKING
+from collections import OrderedDict
+
+if TYPE_CHECKING:
+    from database import Database
+
+# mods diff_calc looks at: speed and circle size changes,
+# and touch device which lowers aim, plays with only other
+# mods can share the same cached stars
+DIFF_MODS = (
+    oppai.MODS_HR | oppai.MODS_EZ |
+    oppai.MODS_DT | oppai.MODS_HT | oppai.MODS_NC |
+    oppai.MODS_TOUCH_DEVICE
+)
+
+class Stars(NamedTuple):
+    aim: float
+    speed: float
+
+class DifficultyCache:
+    """Parsed .osu files by md5 and their aim and speed stars
+    by (md5, mods), the least recently used ones get dropped"""
+
+    def __init__(
+        self, db: Optional['Database'] = None,
+        max_maps: int = 64,
+        max_stars: int = 8192
+    ) -> None:
+        self.db = db
+        self.max_maps = max_maps
+        self.max_stars = max_stars
+        self.parser = oppai.parser()
+
+        self.maps: OrderedDict[str, oppai.beatmap] = OrderedDict()
+        self.stars: OrderedDict[tuple[str, int], Stars] = OrderedDict()
+
+        # keys to write and keys to delete on `update_file`
+        self.added: set[tuple[str, int]] = set()
+        self.evicted: set[tuple[str, int]] = set()
+
+        if self.db:
+            for md5, mods, aim, speed in self.db.connection.execute(
+                'select md5, mods, aim, speed from difficulty order by rowid'
+            ):
+                self.stars[(md5, mods)] = Stars(aim, speed)
+
+            while len(self.stars) > self.max_stars:
+                self.evicted.add(self.stars.popitem(last = False)[0])
+
+    def beatmap(self, md5: str, osu_file: str) -> oppai.beatmap:
+        if md5 in self.maps:
+            self.maps.move_to_end(md5)
+            return self.maps[md5]
+
+        bmap = self.parser.map(osu_file = osu_file.splitlines())
+        self.maps[md5] = bmap
+
+        if len(self.maps) > self.max_maps:
+            self.maps.popitem(last = False)
+
+        return bmap
+
+    def calc(self, md5: str, bmap: oppai.beatmap, mods: int) -> Stars:
+        key = (md5, mods & DIFF_MODS)
+        if key in self.stars:
+            self.stars.move_to_end(key)
+            return self.stars[key]
+
+        diff = oppai.diff_calc().calc(bmap, key[1])
+        stars = self.stars[key] = Stars(diff.aim, diff.speed)
+        self.added.add(key)
+        self.evicted.discard(key)
+
+        if len(self.stars) > self.max_stars:
+            old_key, _ = self.stars.popitem(last = False)
+            self.added.discard(old_key)
+            self.evicted.add(old_key)
+
+        return stars
+
+    def update_file(self) -> None:
+        if not self.db or not (self.added or self.evicted):
+            return
+
+        with self.db.connection:
+            self.db.connection.executemany(
+                'delete from difficulty where md5 = ? and mods = ?',
+                self.evicted
+            )
+            self.db.connection.executemany(
+                'insert or replace into difficulty (md5, mods, aim, speed) '
+                'values (?, ?, ?, ?)',
+                [
+                    (*key, *stars) for key, stars in self.stars.items()
+                    if key in self.added
+                ]
+            )
+
+        self.added.clear()
+        self.evicted.clear()
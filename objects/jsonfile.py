@@ -1,11 +1,17 @@
+import os
 import orjson
+import asyncio
 from typing import Any
 from pathlib import Path
 from typing import Union
+from typing import Optional
 from collections import UserDict
 
 class JsonFile(UserDict):
-    def __init__(self, path: Union[str, Path]) -> None:
+    def __init__(
+        self, path: Union[str, Path],
+        flush_delay: float = 1.0
+    ) -> None:
         self._cached_stamp = None
 
         if isinstance(path, str):
@@ -13,6 +19,13 @@ class JsonFile(UserDict):
         else:
             self.path = path
 
+        # writes are coalesced and done in a
+        # thread `flush_delay` seconds later
+        self.flush_delay = flush_delay
+        self.dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._write_lock = asyncio.Lock()
+
         if not self.path.exists():
             self.path.write_bytes(b"{}")
             super().__init__()
@@ -20,13 +33,74 @@ class JsonFile(UserDict):
             data = orjson.loads(self.path.read_bytes() or b"{}")
             super().__init__(**data)
 
+        # UserDict's __init__ goes through __setitem__
+        self.dirty = False
         self.is_changed()
 
     def __getitem__(self, key: Any) -> Any:
         return self.data[key]
 
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.data[key] = value
+        self.dirty = True
+
+    def __delitem__(self, key: Any) -> None:
+        del self.data[key]
+        self.dirty = True
+
+    def mark_dirty(self) -> None:
+        """For changes made to nested values the file can't see"""
+        self.dirty = True
+
     def update_file(self) -> None:
-        self.path.write_bytes(orjson.dumps(dict(self)))
+        if not self.dirty or self._flush_handle:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # nothing to write in the background with
+            self.write(self.dump())
+            return
+
+        self._flush_handle = loop.call_later(
+            self.flush_delay,
+            lambda: asyncio.create_task(self.flush())
+        )
+
+    def dump(self) -> bytes:
+        self.dirty = False
+        return orjson.dumps(dict(self))
+
+    def write(self, data: bytes) -> None:
+        # write to a temp file first so a crash
+        # mid write never leaves a half written file
+        tmp_path = self.path.with_name(f'{self.path.name}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, self.path)
+        except Exception:
+            # `dump` cleared it, the next flush has to try again
+            self.dirty = True
+            raise
+
+    async def flush(self) -> None:
+        """Writes the file now if anything changed since the last write"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self.dirty:
+            return
+
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.write, self.dump()
+            )
 
     def read_file(self) -> None:
         self.data = orjson.loads(self.path.read_bytes())
@@ -42,4 +116,4 @@ class JsonFile(UserDict):
             self._cached_stamp = stamp
             return True
         else:
-            return False
\ No newline at end of file
+            return False
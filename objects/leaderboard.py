@@ -1,15 +1,20 @@
 import time
+import heapq
 import utils
+import bisect
 from ext import glob
+from typing import Any
 from typing import Union
+from typing import Callable
 from typing import Optional
+from typing import Sequence
+from typing import NamedTuple
 from objects.mods import Mods
 from objects.score import Score
 from constants import ParsedParams
 from objects.beatmap import Beatmap
 from objects.score import BanchoScore
 
-ONLINE_PLAYS = dict[str, list[dict]]
 OSU_API_BASE = 'https://osu.ppy.sh/api'
 
 status_to_db = {
@@ -49,15 +54,12 @@ STARTING_LB_FORMAT = (
     "{rankedstatus}|false|{mapid}|{setid}|{num_of_scores}\n0\n"
     "[bold:0,size:20]{artist_unicode}|{title_unicode}\n10.0\n"
 )
-SCORE_FORMAT = (
-    "{score_id}|{username}|{score}|"
-    "{maxcombo}|{count50}|{count100}|"
-    "{count300}|{countmiss}|{countkatu}|"
-    "{countgeki}|{perfect}|{enabled_mods}|{user_id}|"
-    "{num_on_lb}|{time}|{replay_available}"
-)
 VALID_LB_STATUESES = (LOVED, QUALIFIED, RANKED, APPROVED)
 
+# most scores bancho gives for a map, a personal best
+# ranked after all of them isn't shown in the list
+MAX_SCORES = 100
+
 LB_NOT_SUPPORTED_PLACEHOLDER =  Score(
     0, '', "Not supported atm!", 
     0, 0, 0, 0, 0, 0, 0, 0, False, 0, int(time.time())
@@ -73,81 +75,116 @@ BLANK_BMAP = Beatmap(
 )
 
 SCORE = Union[Score, BanchoScore]
+
+class RenderOptions(NamedTuple):
+    """Everything from the config and session a leaderboard's
+    look depends on, rendering doesn't read or change globals"""
+    pp_leaderboard: bool
+    show_pp_for_personal_best: bool
+    mode: Optional[Mods]
+    # rank of a personal best that isn't one of the scores
+    unlisted_rank: int
+    # modified leaderboards show the rank in front of names
+    rank_names: bool = False
+
+    @classmethod
+    def from_config(cls, **kwargs: Any) -> 'RenderOptions':
+        options: dict[str, Any] = {
+            'pp_leaderboard': glob.config.pp_leaderboard,
+            'show_pp_for_personal_best': glob.config.show_pp_for_personal_best,
+            'mode': glob.mode,
+            'unlisted_rank': glob.config.amount_of_scores_on_lb + 1
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+def pp_key(s: Any) -> int:
+    return int(s.pp)
+
+def score_key(s: Any) -> int:
+    return int(s.score)
+
+def insert_personal_best(
+    ranked: list[SCORE], personal_score: Score,
+    key: Callable[[Any], int], limit: int
+) -> Optional[int]:
+    """Puts `personal_score` into `ranked` (best first by `key`) after
+    any score it ties with and keeps `limit` scores, returns its rank
+    or `None` if it didn't make it into the list"""
+    keys = [-key(s) for s in ranked]
+    idx = bisect.bisect_right(keys, -key(personal_score))
+
+    if idx >= min(limit, MAX_SCORES):
+        return None
+
+    ranked.insert(idx, personal_score)
+    del ranked[limit:]
+    return idx + 1
+
+def render(
+    bmap: Optional[Any], scores: Sequence[SCORE],
+    personal_score: Optional[Score], options: RenderOptions,
+    personal_rank: Optional[int] = None
+) -> bytes:
+    """The getscores response, rows are joined once and encoded once,
+    a pre-sized buffer would need every row encoded first for its size"""
+    if not bmap:
+        return b'0|false'
+
+    r = FROM_API_TO_SERVER_STATUS[bmap.approved]
+    if r not in VALID_LB_STATUESES:
+        return f'{r}|false'.encode()
+
+    rows = [STARTING_LB_FORMAT.format(
+        rankedstatus = r,
+        mapid = bmap.beatmap_id,
+        setid = bmap.beatmapset_id,
+        num_of_scores = len(scores),
+        artist_unicode = bmap.artist_unicode or bmap.artist,
+        title_unicode = bmap.title_unicode or bmap.title
+    )]
+
+    if personal_score:
+        if personal_rank:
+            num_on_lb = personal_rank
+        elif personal_score in scores:
+            num_on_lb = scores.index(personal_score) + 1
+        else:
+            num_on_lb = options.unlisted_rank
+
+        rows[0] += personal_score.leaderboard_row(
+            options, num_on_lb, personal = True
+        )
+
+    for idx, s in enumerate(scores, start = 1):
+        if options.rank_names:
+            rows.append(s.leaderboard_row(
+                options, idx, name = f'({idx}) {s.name}' # type: ignore
+            ))
+        else:
+            rows.append(s.leaderboard_row(options, idx))
+
+    if len(rows) == 1:
+        rows.append('')
+
+    return '\n'.join(rows).encode()
+
 class Leaderboard:
     def __init__(self) -> None:
         self.scores: list[SCORE] = []
         self.bmap: Optional[Beatmap] = None
         self.personal_score: Optional[Score] = None
+        self.personal_rank: Optional[int] = None
 
     def __bytes__(self) -> bytes:
         return self.as_binary
 
-    @property
-    def lb_base_fmt(self) -> Optional[bytes]:
-        if not self.bmap:
-            return
-
-        return STARTING_LB_FORMAT.format(
-            rankedstatus = FROM_API_TO_SERVER_STATUS[self.bmap.approved],
-            mapid = self.bmap.beatmap_id,
-            setid = self.bmap.beatmapset_id,
-            num_of_scores = len(self.scores),
-            artist_unicode = self.bmap.artist_unicode or self.bmap.artist,
-            title_unicode = self.bmap.title_unicode or self.bmap.title
-        ).encode()
-
     @property
     def as_binary(self) -> bytes:
-        if not self.bmap:
-            return b'0|false'
-
-        r = FROM_API_TO_SERVER_STATUS[self.bmap.approved]
-        if r not in VALID_LB_STATUESES:
-            return f'{r}|false'.encode()
-
-        if not self.lb_base_fmt:
-            return f'{r}|false'.encode()
-
-        buffer = bytearray()
-        buffer += self.lb_base_fmt
-
-        if self.personal_score:
-            if self.personal_score not in self.scores:
-                num_on_lb = glob.config.amount_of_scores_on_lb + 1
-            else:
-                num_on_lb = self.scores.index(self.personal_score) + 1
-            
-            buffer += SCORE_FORMAT.format(
-                **self.personal_score.as_leaderboard_score,
-                num_on_lb = num_on_lb
-            ).encode()
-            buffer += b'\n'
-        else:
-            buffer += b'\n'
-
-        len_scores = len(self.scores)
-        enabled = None
-        for idx, s in enumerate(self.scores):
-            idx += 1
-            
-            if idx == 1:
-                if glob.config.show_pp_for_personal_best:
-                    enabled = True
-                    glob.config.show_pp_for_personal_best = False
-                else:
-                    enabled = False
-            
-            buffer += SCORE_FORMAT.format(
-                **s.as_leaderboard_score,
-                num_on_lb = idx
-            ).encode()
-            if idx != len_scores:
-                buffer += b'\n'
-        
-        if enabled:
-            glob.config.show_pp_for_personal_best = True
-
-        return bytes(buffer)
+        return render(
+            self.bmap, self.scores, self.personal_score,
+            RenderOptions.from_config(), self.personal_rank
+        )
 
     @classmethod
     async def from_offline(
@@ -166,65 +203,32 @@ class Leaderboard:
             not glob.player or
             not glob.current_profile
         ):
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
             return lb
 
-        key = 'qualified_plays'
-
-        _player_scores: Optional[ONLINE_PLAYS] = \
-        glob.current_profile['plays'][key]
+        map_bests = glob.personal_bests.get(glob.current_profile).get(
+            'qualified_plays', md5, glob.mode
+        )
 
-        if not _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        if not map_bests:
             return lb
 
-        if md5 not in _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
-            return lb
-
-        player_scores = _player_scores[md5].copy()
-
-        if glob.mode:
-            player_scores = [x for x in player_scores if x['mods'] & glob.mode]
-        else:
-            player_scores = [
-                x for x in player_scores if
-                not x['mods'] & (Mods.RELAX | Mods.AUTOPILOT)
-            ]
-
-        if glob.config.pp_leaderboard or glob.mode:
-            player_scores.sort(key = lambda s: s['pp'], reverse = True)
-        else:
-            player_scores.sort(key = lambda s: s['score'], reverse = True)
-
+        sort_by = 'pp' if glob.config.pp_leaderboard or glob.mode else 'score'
         if rank_type == MODS:
-            player_scores = [x for x in player_scores if x['mods'] & mods]
-            if not player_scores:
-                lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
-                return lb
-
-            player_score = Score.from_dict(player_scores[0])
+            best = map_bests.get_any(sort_by, mods)
         else:
-            player_score = Score.from_dict(player_scores[0])
+            best = map_bests.get(sort_by)
 
-        lb.scores.append(player_score)
-
-        if glob.config.pp_leaderboard:
-            lb.scores.sort(
-                key = lambda s: int(s.pp), # type: ignore
-                reverse = True
-            )
-        else:
-            lb.scores.sort(
-                key = lambda s: int(s.score),
-                reverse = True
-            )
+        if not best:
+            return lb
 
-        if lb.scores.index(player_score) == 100:
-            lb.scores.remove(player_score)
+        player_score = Score.from_dict(best)
 
+        lb.personal_rank = insert_personal_best(
+            lb.scores, player_score,
+            pp_key if glob.config.pp_leaderboard else score_key,
+            glob.config.amount_of_scores_on_lb
+        )
         lb.personal_score = player_score
-        lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
         return lb
 
     @classmethod
@@ -238,109 +242,119 @@ class Leaderboard:
 
         lb.bmap = bmap = await Beatmap.from_md5(md5)
         if not bmap:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
             return lb
 
         ranked_status = FROM_API_TO_SERVER_STATUS[bmap.approved]
         if ranked_status not in VALID_LB_STATUESES:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
             return lb
 
         if glob.config.osu_api_key:
             params = {
                 'k': glob.config.osu_api_key,
                 'b': bmap.beatmap_id,
-                'limit': 100
+                'limit': MAX_SCORES
             }
             if rank_type == MODS:
                 params['mods'] = mods
 
-            async with glob.http.get(
+            # switching mods or leaderboard types asks for the same scores
+            json = await glob.api.get_json(
                 url = f'{OSU_API_BASE}/get_scores',
-                params = params
-            ) as resp:
-                scores: list[SCORE] = [
-                    BanchoScore(x) for x in await resp.json()
-                ]
+                params = params,
+                ttl = glob.config.api_cache_seconds
+            )
+            scores: list[SCORE] = [BanchoScore(x) for x in json or []]
         else:
             scores: list[SCORE] = []
 
-        if glob.config.pp_leaderboard:
-            await bmap.get_file()
-            scores.sort(
-                key = lambda s: utils.calculator(s, bmap)[0],
-                reverse = True
-            )
+        limit = glob.config.amount_of_scores_on_lb
+        # without the .osu file there's no pp to sort by
+        if glob.config.pp_leaderboard and scores and await bmap.get_file():
+            pps, _ = utils.calculator_batch(bmap, scores)
+            top = heapq.nlargest(limit, range(len(scores)), key = pps.__getitem__)
+            scores = [scores[idx] for idx in top]
+        else:
+            scores = heapq.nlargest(limit, scores, key = score_key)
 
         lb.scores = scores
         if (
             not glob.player or
             not glob.current_profile
         ):
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
             return lb
 
         key = f'{status_to_db[bmap.approved]}_plays'
 
-        _player_scores: Optional[ONLINE_PLAYS] = \
-        glob.current_profile['plays'][key]
+        map_bests = glob.personal_bests.get(glob.current_profile).get(
+            key, md5, glob.mode
+        )
 
-        if not _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        if not map_bests:
             return lb
 
-        if md5 not in _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        sort_by = 'pp' if glob.config.pp_leaderboard or glob.mode else 'score'
+        best = map_bests.get(sort_by, int(mods) if rank_type == MODS else None)
+        if not best:
             return lb
 
-        player_scores = _player_scores[md5]
-        if glob.mode:
-            player_scores = [
-                x for x in player_scores if x['mods'] & glob.mode
-            ]
-        else:
-            player_scores = [
-                x for x in player_scores if
-                not x['mods'] & (Mods.RELAX | Mods.AUTOPILOT)
-            ]
+        player_score = Score.from_dict(best)
 
-        if not player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
-            return lb
+        lb.personal_rank = insert_personal_best(
+            lb.scores, player_score,
+            pp_key if glob.config.pp_leaderboard else score_key,
+            limit
+        )
+        lb.personal_score = player_score
+        return lb
 
-        if glob.config.pp_leaderboard or glob.mode:
-            player_scores.sort(key = lambda s: s['pp'], reverse = True)
-        else:
-            player_scores.sort(key = lambda s: s['score'], reverse = True)
+    @classmethod
+    async def from_profiles(
+        cls, client_params: ParsedParams
+    ) -> 'Leaderboard':
+        """Best play of every profile on the map"""
+        lb = cls()
+        md5 = client_params['md5']
 
-        if rank_type == MODS:
-            player_scores = [x for x in player_scores if x['mods'] == mods]
-            if not player_scores:
-                lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        if glob.config.osu_api_key:
+            lb.bmap = bmap = await Beatmap.from_md5(md5)
+            if (
+                not bmap or
+                FROM_API_TO_SERVER_STATUS[bmap.approved] not in VALID_LB_STATUESES
+            ):
                 return lb
 
-            player_score = Score.from_dict(player_scores[0])
+            key = f'{status_to_db[bmap.approved]}_plays'
         else:
-            player_score = Score.from_dict(player_scores[0])
+            lb.bmap = BLANK_BMAP
+            key = 'qualified_plays'
+
+        sort_by = 'pp' if glob.config.pp_leaderboard or glob.mode else 'score'
+        bests = {
+            name: best for name, map_bests in
+            glob.personal_bests.local(key, md5, glob.mode).items()
+            if (best := map_bests.get(sort_by))
+        }
+
+        top = heapq.nlargest(
+            glob.config.amount_of_scores_on_lb,
+            bests.items(), key = lambda item: item[1][sort_by]
+        )
+
+        player_name = glob.player.name if glob.player else None
+        for rank, (name, play) in enumerate(top, start = 1):
+            score = Score.from_dict(play)
+
+            # replays are looked up by scoreid in the current profile
+            if name != player_name:
+                score.scoreid = None
+            else:
+                lb.personal_rank = rank
 
-        lb.scores.append(player_score)
+            lb.scores.append(score)
 
-        if glob.config.pp_leaderboard:
-            lb.scores.sort(
-                key = lambda s: int(s.pp), # type: ignore
-                reverse = True
-            )
-        else:
-            lb.scores.sort(
-                key = lambda s: int(s.score),
-                reverse = True
-            )
-
-        if lb.scores.index(player_score) == 100:
-            lb.scores.remove(player_score)
+        if player_name in bests:
+            lb.personal_score = Score.from_dict(bests[player_name])
 
-        lb.personal_score = player_score
-        lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
         return lb
 
 class NotSupported(Leaderboard):
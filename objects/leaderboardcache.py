@@ -0,0 +1,73 @@
+import time
+from ext import glob
+from typing import Any
+from typing import Optional
+from constants import ParsedParams
+
+LB_KEY = tuple[Any, ...]
+
+class LeaderboardCache:
+    """Rendered leaderboards so reselecting a map is a dict lookup,
+    they expire after `config.leaderboard_cache_seconds` and get
+    dropped as soon as a score is set on the map"""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self.entries: dict[LB_KEY, tuple[float, bytes]] = {}
+
+        # md5 -> keys of its leaderboards
+        self.md5s: dict[str, set[LB_KEY]] = {}
+
+    @staticmethod
+    def key(params: ParsedParams) -> LB_KEY:
+        return (
+            params['md5'], params['mods'], params['rank_type'],
+            glob.mode, glob.config.pp_leaderboard,
+            glob.player.name if glob.player else None
+        )
+
+    def get(self, key: LB_KEY) -> Optional[bytes]:
+        if key not in self.entries:
+            return
+
+        expires, body = self.entries[key]
+        if expires <= time.monotonic():
+            self.remove(key)
+            return
+
+        return body
+
+    def add(self, key: LB_KEY, body: bytes) -> None:
+        if glob.config.leaderboard_cache_seconds <= 0:
+            return
+
+        now = time.monotonic()
+        if len(self.entries) >= self.max_entries:
+            for expired in [
+                k for k, (expires, _) in self.entries.items()
+                if expires <= now
+            ]:
+                self.remove(expired)
+
+        self.entries[key] = (
+            now + glob.config.leaderboard_cache_seconds, body
+        )
+        self.md5s.setdefault(key[0], set()).add(key)
+
+    def remove(self, key: LB_KEY) -> None:
+        del self.entries[key]
+
+        keys = self.md5s[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.md5s[key[0]]
+
+    def invalidate(self, md5: str) -> None:
+        """For when a score was set on `md5`"""
+        for key in self.md5s.pop(md5, ()):
+            del self.entries[key]
+
+    def clear(self) -> None:
+        """For when anything all leaderboards depend on changed"""
+        self.entries.clear()
+        self.md5s.clear()
@@ -8,8 +8,6 @@ from typing import Optional
 from constants import ParsedParams
 from objects.beatmap import Beatmap
 
-parser = oppai.parser()
-
 class ModifiedBeatmap:
     def __init__(self, **kwargs) -> None:
         self.__dict__.update(**kwargs)
@@ -30,8 +28,8 @@ class ModifiedBeatmap:
 
     @functools.cached_property
     def map_file(self) -> oppai.beatmap:
-        return parser.map(
-            osu_file = self.file_content.splitlines()
+        return glob.difficulty.beatmap(
+            self.file_md5, self.file_content
         )
 
     def as_dict(self) -> dict:
@@ -1,15 +1,17 @@
+import heapq
 from ext import glob
 from typing import Union
 from typing import Optional
 from utils import log_error
-from objects.mods import Mods
 from objects.score import Score
 from constants import ParsedParams
 from objects.beatmap import Beatmap
+from objects.leaderboard import render
+from objects.leaderboard import RenderOptions
 from objects.modifiedfinder import ModifiedFinder
+from objects.personalbests import mode_families
 from objects.modifiedbeatmap import ModifiedBeatmap
 
-ONLINE_PLAYS = dict[str, list[dict]]
 OSU_API_BASE = 'https://osu.ppy.sh/api'
 
 status_to_db = {
@@ -45,17 +47,6 @@ FROM_API_TO_SERVER_STATUS = {
     -2: PENDING  # graveyard
 }
 
-STARTING_LB_FORMAT = (
-    "{rankedstatus}|false|{mapid}|{setid}|{num_of_scores}\n0\n"
-    "[bold:0,size:20]{artist_unicode}|{title_unicode}\n10.0\n"
-)
-SCORE_FORMAT = (
-    "{score_id}|{username}|{score}|"
-    "{maxcombo}|{count50}|{count100}|"
-    "{count300}|{countmiss}|{countkatu}|"
-    "{countgeki}|{perfect}|{enabled_mods}|{user_id}|"
-    "{num_on_lb}|{time}|{replay_available}"
-)
 VALID_LB_STATUESES = (LOVED, QUALIFIED, RANKED, APPROVED)
 
 BMAPID_OR_MD5 = Union[int, str]
@@ -66,73 +57,12 @@ class ModifiedLeaderboard:
         self.bmap: Optional[BEATMAP] = None
         self.personal_score: Optional[Score] = None
 
-    @property
-    def lb_base_fmt(self) -> Optional[bytes]:
-        if not self.bmap:
-            return
-
-        return STARTING_LB_FORMAT.format(
-            rankedstatus = FROM_API_TO_SERVER_STATUS[self.bmap.approved],
-            mapid = self.bmap.beatmap_id,
-            setid = self.bmap.beatmapset_id,
-            num_of_scores = len(self.scores),
-            artist_unicode = self.bmap.artist_unicode or self.bmap.artist,
-            title_unicode = self.bmap.title_unicode or self.bmap.title
-        ).encode()
-
     @property
     def as_binary(self) -> bytes:
-        if not self.bmap:
-            return b'0|false'
-
-        r = FROM_API_TO_SERVER_STATUS[self.bmap.approved]
-        if r not in VALID_LB_STATUESES:
-            return f'{r}|false'.encode()
-
-        if not self.lb_base_fmt:
-            return f'{r}|false'.encode()
-
-        buffer = bytearray()
-        buffer += self.lb_base_fmt
-
-        if self.personal_score:
-            if self.personal_score not in self.scores:
-                num_on_lb = 1
-            else:
-                num_on_lb = self.scores.index(self.personal_score) + 1
-
-            buffer += SCORE_FORMAT.format(
-                **self.personal_score.as_leaderboard_score,
-                num_on_lb = num_on_lb
-            ).encode()
-            buffer += b'\n'
-        else:
-            buffer += b'\n'
-
-        len_scores = len(self.scores)
-        enabled = None
-        for idx, s in enumerate(self.scores):
-            idx += 1
-            
-            if idx == 1:
-                if glob.config.show_pp_for_personal_best:
-                    enabled = True
-                    glob.config.show_pp_for_personal_best = False
-                else:
-                    enabled = False
-            
-            s.name = f'({idx}) {s.name}'
-            buffer += SCORE_FORMAT.format(
-                **s.as_leaderboard_score,
-                num_on_lb = idx
-            ).encode()
-            if idx != len_scores:
-                buffer += b'\n'
-        
-        if enabled:
-            glob.config.show_pp_for_personal_best = True
-
-        return bytes(buffer)
+        return render(
+            self.bmap, self.scores, self.personal_score,
+            RenderOptions.from_config(unlisted_rank = 1, rank_names = True)
+        )
 
     @classmethod
     async def from_client(
@@ -224,48 +154,32 @@ class ModifiedLeaderboard:
 
         key = f'{status_to_db[bmap.approved]}_plays'
 
-        _player_scores: Optional[ONLINE_PLAYS] = \
-        glob.current_profile['plays'][key]
+        map_bests = glob.personal_bests.get(glob.current_profile).get(
+            key, bmap.file_md5, glob.mode
+        )
 
-        if not _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        if not map_bests:
             return lb
 
-        if bmap.file_md5 not in _player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        sort_by = 'pp' if glob.config.pp_leaderboard or glob.mode else 'score'
+        mods = params['mods'] if params['rank_type'] == MODS else None
+        if not (best := map_bests.get(sort_by, mods)):
             return lb
 
-        player_scores = _player_scores[bmap.file_md5]
+        lb.personal_score = Score.from_dict(best)
 
-        if glob.mode:
-            player_scores = [
-                x for x in player_scores if x['mods'] & glob.mode
-            ]
-        else:
-            player_scores = [
-                x for x in player_scores if
-                not x['mods'] & (Mods.RELAX | Mods.AUTOPILOT)
-            ]
-
-        if not player_scores:
-            lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
-            return lb
+        # every play of the map is shown, not just the best
+        family = int(glob.mode or 0)
+        player_scores = [
+            x for x in glob.current_profile['plays'][key][bmap.file_md5]
+            if family in mode_families(x['mods']) and
+            (mods is None or x['mods'] == mods)
+        ]
 
-        if glob.config.pp_leaderboard or glob.mode:
-            player_scores.sort(key = lambda s: s['pp'], reverse = True)
-        else:
-            player_scores.sort(key = lambda s: s['score'], reverse = True)
-
-        if params['rank_type'] == MODS:
-            player_scores = [
-                x for x in player_scores if
-                x['mods'] == params['mods']
-            ]
-            if not player_scores:
-                lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
-                return lb
-
-        lb.personal_score = Score.from_dict(player_scores[0])
-        lb.scores = [Score.from_dict(x) for x in player_scores]
-        lb.scores = lb.scores[:glob.config.amount_of_scores_on_lb]
+        lb.scores = [
+            Score.from_dict(x) for x in heapq.nlargest(
+                glob.config.amount_of_scores_on_lb,
+                player_scores, key = lambda s: s[sort_by]
+            )
+        ]
         return lb
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+import hashlib
+from pathlib import Path
+from typing import Optional
+from collections import OrderedDict
+
+class OsuFileCache:
+    """.osu files saved as `{md5}.osu`, the least recently
+    used ones are deleted once the folder gets over `max_size`"""
+
+    def __init__(
+        self, folder: Path,
+        max_size: int = 256 * 1024 * 1024
+    ) -> None:
+        self.folder = folder
+        self.max_size = max_size
+        self.size = 0
+
+        # md5 -> file size, oldest first
+        self.entries: OrderedDict[str, int] = OrderedDict()
+
+        if not self.folder.exists():
+            self.folder.mkdir(exist_ok=True)
+
+        # mtime is bumped on every hit so
+        # the order survives restarts
+        files = [
+            entry for entry in os.scandir(self.folder)
+            if entry.name.endswith('.osu')
+        ]
+        files.sort(key = lambda e: e.stat().st_mtime)
+        for entry in files:
+            size = entry.stat().st_size
+            self.entries[entry.name[:-4]] = size
+            self.size += size
+
+        self.evict()
+
+    def __contains__(self, md5: str) -> bool:
+        return md5 in self.entries
+
+    def path(self, md5: str) -> Path:
+        return self.folder / f'{md5}.osu'
+
+    def get(self, md5: str) -> Optional[bytes]:
+        if md5 not in self.entries:
+            return
+
+        path = self.path(md5)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.size -= self.entries.pop(md5)
+            return
+
+        self.entries.move_to_end(md5)
+        return content
+
+    def put(self, md5: str, content: bytes) -> bool:
+        """Saves `content` if it really is the file for `md5`"""
+        if hashlib.md5(content).hexdigest() != md5:
+            return False
+
+        if md5 in self.entries:
+            self.entries.move_to_end(md5)
+            return True
+
+        path = self.path(md5)
+        tmp_path = path.with_name(f'{path.name}.tmp')
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+        self.entries[md5] = len(content)
+        self.size += len(content)
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        while self.size > self.max_size and self.entries:
+            md5, size = self.entries.popitem(last = False)
+            self.size -= size
+
+            try:
+                self.path(md5).unlink()
+            except OSError:
+                pass
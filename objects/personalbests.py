@@ -0,0 +1,154 @@
+from ext import glob
+from typing import Optional
+from objects.mods import Mods
+
+# status plays key, md5 and mode family
+MAP_KEY = tuple[str, str, int]
+SORT_KEYS = ('pp', 'score')
+
+def mode_families(mods: int) -> list[int]:
+    """Modes a play shows up in, like `glob.mode` filters them"""
+    families = [
+        int(mode) for mode in (Mods.RELAX, Mods.AUTOPILOT)
+        if mods & mode
+    ]
+
+    return families or [0]
+
+class MapBests:
+    """Best play by pp and by score of one map and mode,
+    in total and for every mod combination played"""
+
+    def __init__(self) -> None:
+        self.best: dict[str, dict] = {}
+        self.by_mods: dict[int, dict[str, dict]] = {}
+
+    @staticmethod
+    def update(best: dict[str, dict], play: dict) -> None:
+        # ties keep the older play
+        for sort_by in SORT_KEYS:
+            if sort_by not in best or play[sort_by] > best[sort_by][sort_by]:
+                best[sort_by] = play
+
+    def add(self, play: dict) -> None:
+        self.update(self.best, play)
+        self.update(self.by_mods.setdefault(int(play['mods']), {}), play)
+
+    def get(self, sort_by: str, mods: Optional[int] = None) -> Optional[dict]:
+        """Best play overall or with exactly `mods`"""
+        if mods is None:
+            return self.best.get(sort_by)
+
+        if mods not in self.by_mods:
+            return
+
+        return self.by_mods[mods][sort_by]
+
+    def get_any(self, sort_by: str, mods: int) -> Optional[dict]:
+        """Best play having any of `mods`"""
+        plays = [
+            best[sort_by] for played_mods, best in self.by_mods.items()
+            if played_mods & mods
+        ]
+
+        if not plays:
+            return
+
+        # the same play wins a tie as when scanning the plays in order
+        return max(plays, key = lambda p: (p[sort_by], -p.get('scoreid', 0)))
+
+class ProfileBests:
+    """`MapBests` of every map a profile played"""
+
+    def __init__(self) -> None:
+        self.maps: dict[MAP_KEY, MapBests] = {}
+
+    def add(self, key: str, play: dict) -> None:
+        for family in mode_families(play['mods']):
+            self.maps.setdefault(
+                (key, play['md5'], family), MapBests()
+            ).add(play)
+
+    def get(
+        self, key: str, md5: str,
+        mode: Optional[Mods] = None
+    ) -> Optional[MapBests]:
+        return self.maps.get((key, md5, int(mode or 0)))
+
+    @classmethod
+    def from_profile(cls, profile: dict) -> 'ProfileBests':
+        bests = cls()
+
+        for key, plays in profile['plays'].items():
+            if not key.endswith('_plays') or not isinstance(plays, dict):
+                continue
+
+            for map_plays in plays.values():
+                for play in map_plays:
+                    bests.add(key, play)
+
+        return bests
+
+class PersonalBestIndex:
+    """`ProfileBests` per profile, built on first use, and every
+    profile's `MapBests` per map for leaderboards of all profiles"""
+
+    def __init__(self) -> None:
+        # id(profile) -> (profile, its bests)
+        self.profiles: dict[int, tuple[dict, ProfileBests]] = {}
+
+        # map -> {name: its bests}, built from the profiles in `local_ids`
+        self.local_maps: dict[MAP_KEY, dict[str, MapBests]] = {}
+        self.local_ids: dict[str, int] = {}
+
+    def get(self, profile: dict) -> ProfileBests:
+        if id(profile) not in self.profiles:
+            # profiles that were wiped or deleted are replaced
+            current = {id(p) for p in glob.profiles.values()}
+            for profile_id in self.profiles.keys() - current:
+                del self.profiles[profile_id]
+
+            self.profiles[id(profile)] = (
+                profile, ProfileBests.from_profile(profile)
+            )
+
+        return self.profiles[id(profile)][1]
+
+    def add(self, profile: dict, key: str, play: dict) -> None:
+        """Adds a play that was just added to `profile['plays'][key]`"""
+        if id(profile) not in self.profiles:
+            return
+
+        bests = self.profiles[id(profile)][1]
+        bests.add(key, play)
+
+        for name, profile_id in self.local_ids.items():
+            if profile_id != id(profile):
+                continue
+
+            for family in mode_families(play['mods']):
+                map_key = (key, play['md5'], family)
+                self.local_maps.setdefault(map_key, {})[name] = bests.maps[map_key]
+
+    def local(
+        self, key: str, md5: str,
+        mode: Optional[Mods] = None
+    ) -> dict[str, MapBests]:
+        """Bests of a map for every profile that played it"""
+        current = {name: id(p) for name, p in glob.profiles.items()}
+        if current != self.local_ids:
+            # a profile was made, wiped or deleted
+            self.local_maps.clear()
+            for name, profile in glob.profiles.items():
+                for map_key, map_bests in self.get(profile).maps.items():
+                    self.local_maps.setdefault(map_key, {})[name] = map_bests
+
+            self.local_ids = current
+
+        return self.local_maps.get((key, md5, int(mode or 0)), {})
+
+    def clear(self) -> None:
+        """Everything gets rebuilt, for when pp changes like on recalc"""
+        self.profiles.clear()
+        self.local_maps.clear()
+        self.local_ids.clear()
@@ -8,9 +8,6 @@ from typing import Union
 from typing import Optional
 from objects.mods import Mods
 
-SCORES = list[dict]
-RANKED_PLAYS = dict[str, list[dict]]
-APPROVED_PLAYS = RANKED_PLAYS
 OSU_DAILY_API = 'https://osudaily.net/api'
 
 class Player:
@@ -106,45 +103,20 @@ class Player:
     async def update(
         self, filter_mod: Optional[Mods] = None
     ) -> None:
-        scores: SCORES = []
-
         if not glob.current_profile:
             glob.current_profile = glob.profiles[self.name]
 
-        ranked_plays: Optional[RANKED_PLAYS] = \
-        glob.current_profile['plays']['ranked_plays']
-
-        approved_plays: Optional[APPROVED_PLAYS] = \
-        glob.current_profile['plays']['approved_plays']
-
-        for plays in (ranked_plays, approved_plays):
-            if plays:
-                for v in plays.values():
-                    scores.extend(v)
-
-        if filter_mod:
-            scores = [
-                x for x in scores if
-                x['mods'] & filter_mod
-            ]
-        else:
-            scores = [
-                x for x in scores if
-                not x['mods'] & (Mods.RELAX | Mods.AUTOPILOT)
-            ]
+        top_plays = glob.top_plays.get(glob.current_profile, filter_mod)
 
         if glob.config.disable_funorange_maps:
-            scores = [
-                x for x in scores if 
-                x['md5'] not in glob.modified_beatmaps
-            ]
+            exclude = glob.modified_beatmaps
+        else:
+            exclude = ()
 
-        scores.sort(key = lambda s: s['pp'], reverse = True)
-        top_scores = utils.filter_top_scores(scores[:100])
-        top_scores.sort(key = lambda s: s['pp'], reverse = True)
+        top_scores = top_plays.top(100, exclude)
 
         pp = sum([s['pp'] * 0.95 ** i for i, s in enumerate(top_scores)])
-        pp += 416.6667 * (1 - (0.9994 ** len(scores)))
+        pp += 416.6667 * (1 - (0.9994 ** top_plays.count(exclude)))
         self.pp = round(pp)
 
         # TODO: figure out how acc calc is wrong
@@ -0,0 +1,243 @@
+import os
+import time
+import utils
+import orjson
+import ppcalc
+import asyncio
+from ext import glob
+from utils import log
+from utils import Color
+from utils import log_error
+from typing import Any
+from typing import Optional
+from objects.beatmap import Beatmap
+from concurrent.futures import ProcessPoolExecutor
+from objects.modifiedbeatmap import ModifiedBeatmap
+
+MAP_PLAYS = list[tuple[str, str, dict]]
+
+ACCEPTED_STATUSES = ('ranked', 'approved')
+CHECKPOINT_KEY = 'recalc'
+
+def play_stats(play: dict) -> ppcalc.STATS:
+    return (
+        int(play['mods']), play['n300'], play['n100'],
+        play['n50'], play['nmiss'], play['max_combo']
+    )
+
+class Recalculator:
+    """Recalculates every ranked and approved play of a profile (or `all`),
+    plays are grouped by map, maps are calculated in a process pool and
+    results are written every `batch_size` plays along with a checkpoint
+    so an interrupted run picks up where it left off"""
+
+    def __init__(
+        self, name: str,
+        workers: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> None:
+        self.name = name
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+        self.total = 0
+        self.done = 0
+        self.resumed = 0
+        self.failed = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+        # kept so the running task can't be garbage collected
+        self.task: Optional[asyncio.Task] = None
+
+        # profiles as they were when the plays were collected
+        self.profiles: dict[str, dict] = {}
+
+        # maps already written by this or an earlier interrupted run
+        self.done_md5s: set[str] = set()
+
+        self.pending: dict[str, list[tuple[str, dict]]] = {}
+        self.pending_md5s: list[str] = []
+        self.pending_plays = 0
+
+        checkpoint = glob.db.get_meta(CHECKPOINT_KEY)
+        if checkpoint:
+            checkpoint = orjson.loads(checkpoint)
+            if checkpoint['name'] == self.name:
+                self.done_md5s = set(checkpoint['done'])
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def plays_per_second(self) -> float:
+        if not self.elapsed:
+            return 0.0
+
+        return self.done / self.elapsed
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'running': self.running,
+            'done': self.done,
+            'total': self.total,
+            'resumed': self.resumed,
+            'failed': self.failed,
+            'elapsed': round(self.elapsed, 2),
+            'plays_per_second': round(self.plays_per_second, 2)
+        }
+
+    def collect(self) -> dict[str, MAP_PLAYS]:
+        if self.name == 'all':
+            names = list(glob.profiles)
+        else:
+            names = [self.name]
+
+        maps: dict[str, MAP_PLAYS] = {}
+        for name in names:
+            profile = self.profiles[name] = glob.profiles[name]
+
+            for status in ACCEPTED_STATUSES:
+                plays: dict[str, list[dict]] = profile['plays'][f'{status}_plays']
+
+                for md5, map_plays in plays.items():
+                    if md5 in self.done_md5s:
+                        self.resumed += len(map_plays)
+                        continue
+
+                    maps.setdefault(md5, []).extend(
+                        (name, status, play) for play in map_plays
+                    )
+
+        return maps
+
+    def add_results(
+        self, md5: str, plays: MAP_PLAYS,
+        pps: list[float], accs: list[Optional[float]]
+    ) -> None:
+        for (name, status, play), pp, acc in zip(plays, pps, accs):
+            # the profile was wiped or deleted while calculating
+            if glob.profiles.get(name) is not self.profiles[name]:
+                continue
+
+            play['pp'] = pp
+            if acc is not None:
+                play['acc'] = acc
+
+            # the dict is shared with all_plays so that's updated too
+            if play.get('scoreid'):
+                self.pending.setdefault(name, []).append((status, play))
+
+        self.done += len(plays)
+        self.pending_plays += len(plays)
+        self.pending_md5s.append(md5)
+
+        if self.pending_plays >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the results so far and the checkpoint"""
+        if not self.pending_md5s:
+            return
+
+        for name, plays in self.pending.items():
+            glob.profiles.update_plays(name, plays)
+
+        self.done_md5s.update(self.pending_md5s)
+        glob.top_plays.clear()
+        glob.personal_bests.clear()
+        glob.leaderboards.clear()
+        glob.db.set_meta(CHECKPOINT_KEY, orjson.dumps({
+            'name': self.name,
+            'done': list(self.done_md5s)
+        }).decode())
+
+        self.pending.clear()
+        self.pending_md5s.clear()
+        self.pending_plays = 0
+
+        log(
+            f'{self.done}/{self.total} plays calculated',
+            f'({self.plays_per_second:.1f} plays/s)',
+            color = Color.LIGHTMAGENTA_EX
+        )
+
+    async def recalc_map(
+        self, md5: str, plays: MAP_PLAYS,
+        pool: Optional[ProcessPoolExecutor],
+        limit: asyncio.Semaphore
+    ) -> None:
+        async with limit:
+            try:
+                bmap = (
+                    await ModifiedBeatmap.from_md5(md5) or
+                    await Beatmap.from_md5(md5)
+                )
+
+                if not bmap or not (osu_file := await bmap.get_file()):
+                    pps, accs = [0.0] * len(plays), [None] * len(plays)
+                else:
+                    pps, accs = await asyncio.get_running_loop().run_in_executor(
+                        pool, ppcalc.calc_map, osu_file,
+                        [play_stats(play) for *_, play in plays]
+                    )
+            except Exception as e:
+                self.failed += len(plays)
+                log_error(f'failed to recalculate {md5}: {e!r}')
+                return
+
+        self.add_results(md5, plays, pps, accs)
+
+    def start(self) -> asyncio.Task:
+        self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def run(self) -> None:
+        self.started = time.monotonic()
+        maps = self.collect()
+        self.total = sum(map(len, maps.values()))
+
+        if self.resumed:
+            log(
+                f'resuming recalculation, {self.resumed} plays were already done',
+                color = Color.LIGHTMAGENTA_EX
+            )
+
+        try:
+            pool = ProcessPoolExecutor(self.workers)
+        except (OSError, NotImplementedError):
+            # no multiprocessing here, threads will have to do
+            pool = None
+
+        # a couple maps are queued per worker while .osu files load
+        limit = asyncio.Semaphore(self.workers * 2)
+
+        try:
+            await asyncio.gather(*[
+                self.recalc_map(md5, plays, pool, limit)
+                for md5, plays in maps.items()
+            ])
+        finally:
+            self.flush()
+            if pool:
+                pool.shutdown(wait = False, cancel_futures = True)
+
+        self.finished = time.monotonic()
+        if not self.failed:
+            glob.db.set_meta(CHECKPOINT_KEY, None)
+
+        log(
+            f'finished recalcing! {self.done} plays in {self.elapsed:.1f}s',
+            f'({self.plays_per_second:.1f} plays/s)',
+            color = Color.LIGHTMAGENTA_EX
+        )
+        utils.update_files()
@@ -1,7 +1,9 @@
 import lzma
 import struct
+from array import array
 from enum import IntFlag
 from pathlib import Path
+from typing import Iterator
 from typing import Optional
 from objects.mods import Mods
 
@@ -45,10 +47,68 @@ class Frame:
             float(y), Key(int(z))
         )
 
+BYTE = struct.Struct('<b')
+SHORT = struct.Struct('<h')
+INT = struct.Struct('<i')
+LONG_LONG = struct.Struct('<q')
+DOUBLE = struct.Struct('<d')
+
+# mode, version
+HEADER_START = struct.Struct('<bi')
+# n300, n100, n50, ngeki, nkatu, nmiss,
+# total_score, combo, perfect, mods
+HEADER_STATS = struct.Struct('<6hihbi')
+
+class Frames:
+    """Replay frames kept as one array per column rather
+    than a `Frame` object per frame, use `Frames.decode`"""
+
+    def __init__(
+        self, delta_time: array,
+        x: array, y: array,
+        keys: array
+    ) -> None:
+        self.delta_time = delta_time
+        self.x = x
+        self.y = y
+        self.keys = keys
+
+    @classmethod
+    def decode(cls, raw_frames: bytes) -> 'Frames':
+        """Decodes all frames of an uncompressed replay stream at once"""
+        if not (raw_frames := raw_frames.strip(b',')):
+            values = []
+        else:
+            # `w|x|y|z,w|x|y|z` -> `w,x,y,z,w,x,y,z`
+            values = raw_frames.replace(b'|', b',').split(b',')
+
+        if len(values) % 4:
+            raise ValueError('frames should have 4 values each!')
+
+        return cls(
+            delta_time = array('d', map(float, values[0::4])),
+            x = array('d', map(float, values[1::4])),
+            y = array('d', map(float, values[2::4])),
+            keys = array('i', map(int, values[3::4]))
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, idx: int) -> Frame:
+        return Frame(
+            self.delta_time[idx], self.x[idx],
+            self.y[idx], Key(self.keys[idx])
+        )
+
+    def __iter__(self) -> Iterator[Frame]:
+        for idx in range(len(self)):
+            yield self[idx]
+
 class Replay:
     def __init__(self, raw_replay: bytes) -> None:
         """https://osu.ppy.sh/wiki/en/osu%21_File_Formats/Osr_%28file_format%29"""
-        self._data = raw_replay
+        self._data = memoryview(raw_replay)
         self.offset = 0
 
         self.mode: int
@@ -70,12 +130,18 @@ class Replay:
         self.timestamp: int
         self.score_id: int
         self.additional_mods: Optional[int] = None
-        self.frames: list[Frame]
-        self.raw_frames: bytes
+        self.raw_frames: memoryview
+        self._frames: Optional[Frames] = None
 
     @property
-    def data(self) -> bytes:
-        return self._data[self.offset:]
+    def frames(self) -> Frames:
+        """Frames are only decompressed and decoded once asked for"""
+        if self._frames is None:
+            self._frames = Frames.decode(
+                lzma.decompress(self.raw_frames)
+            )
+
+        return self._frames
 
     @classmethod
     def from_file(cls, path: Path) -> 'Replay':
@@ -89,82 +155,82 @@ class Replay:
         replay.parse()
         return replay
 
-    def parse(self) -> None:
-        self.mode = self.read_byte()
-        self.version = self.read_int()
+    def parse_header(self) -> None:
+        self.mode, self.version = self.read_struct(HEADER_START)
         self.beatmap_md5 = self.read_string()
         self.player_name = self.read_string()
         self.replay_md5 = self.read_string()
-        self.n300 = self.read_short()
-        self.n100 = self.read_short()
-        self.n50 = self.read_short()
-        self.ngeki = self.read_short()
-        self.nkatu = self.read_short()
-        self.nmiss = self.read_short()
-        self.total_score = self.read_int()
-        self.combo = self.read_short()
-        self.perfect = bool(self.read_byte())
-        self.mods = Mods(self.read_int())
+        (
+            self.n300, self.n100, self.n50,
+            self.ngeki, self.nkatu, self.nmiss,
+            self.total_score, self.combo,
+            perfect, mods
+        ) = self.read_struct(HEADER_STATS)
+        self.perfect = bool(perfect)
+        self.mods = Mods(mods)
         self.bar_graph = [LifeBar.from_raw_bar(x) for x in self.read_string().split('|')]
         self.timestamp = self.read_long_long()
 
-        self.raw_frames = self.read_raw(self.read_int())
-        decoded_frames = lzma.decompress(self.raw_frames).split(b',')
-        self.frames = [Frame.from_raw_frame(x) for x in decoded_frames if x]
+    def parse(self) -> None:
+        """Parses everything but the frames themselves, those stay
+        compressed in `raw_frames` (a view into the replay) until
+        `frames` is used"""
+        self.parse_header()
+
+        length = self.read_int()
+        self.raw_frames = self._data[self.offset:self.offset + length]
+        self.offset += length
 
         self.scoreid = self.read_long_long()
 
         if self.mods & Mods.TARGET:
             self.additional_mods = self.read_double()
 
+    def read_struct(self, fmt: struct.Struct) -> tuple:
+        val = fmt.unpack_from(self._data, self.offset)
+        self.offset += fmt.size
+        return val
+
     def read_byte(self) -> int:
-        val, = struct.unpack('<b', self.data[:1])
-        self.offset += 1
+        val, = self.read_struct(BYTE)
         return val
 
     def read_short(self) -> int:
-        val, = struct.unpack('<h', self.data[:2])
-        self.offset += 2
+        val, = self.read_struct(SHORT)
         return val
 
     def read_int(self) -> int:
-        val, = struct.unpack('<i', self.data[:4])
-        self.offset += 4
+        val, = self.read_struct(INT)
         return val
 
     def read_long_long(self) -> int:
-        val, = struct.unpack('<q', self.data[:8])
-        self.offset += 8
+        val, = self.read_struct(LONG_LONG)
         return val
 
     def read_double(self) -> int:
-        val, = struct.unpack('<d', self.data[:8])
-        self.offset += 8
+        val, = self.read_struct(DOUBLE)
         return val
 
     def read_uleb128(self) -> int:
         val = shift = 0
 
         while True:
-            b = self.data[0]
+            b = self._data[self.offset]
             self.offset += 1
 
             val |= ((b & 0b01111111) << shift)
             if (b & 0b10000000) == 0:
                 break
 
-
             shift += 7
 
         return val
 
     def read_string(self) -> str:
         if self.read_byte() == 0x0b:
-            return self.read_raw(self.read_uleb128()).decode()
-
-        return ''
+            length = self.read_uleb128()
+            val = str(self._data[self.offset:self.offset + length], 'utf-8')
+            self.offset += length
+            return val
 
-    def read_raw(self, length: int) -> bytes:
-        val = self.data[:length]
-        self.offset += length
-        return val
\ No newline at end of file
+        return ''
\ No newline at end of file
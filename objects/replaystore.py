@@ -0,0 +1,89 @@
+import os
+import ast
+import base64
+import string
+from pathlib import Path
+from typing import Union
+from typing import Callable
+from typing import Optional
+
+def decode_base64(frames: str) -> bytes:
+    return base64.b64decode(frames.encode('ascii'))
+
+def decode_repr(frames: str) -> bytes:
+    """Replays used to be saved as `repr(frames)`"""
+    try:
+        value = ast.literal_eval(frames)
+    except SyntaxError as e:
+        raise ValueError(f'invalid replay frames: {e}')
+
+    if not isinstance(value, bytes):
+        raise ValueError('replay frames have to be bytes')
+
+    return value
+
+# the first 2 characters of a saved replay -> its decoder,
+# base64 is used for everything else (it can't have quotes)
+DECODERS: dict[str, Callable[[str], bytes]] = {
+    "b'": decode_repr,
+    'b"': decode_repr
+}
+
+def decode_frames(frames: str) -> bytes:
+    """Decodes replay frames saved in a play, raises `ValueError` if it can't"""
+    return DECODERS.get(frames[:2], decode_base64)(frames)
+
+def is_md5(value: Optional[str]) -> bool:
+    return (
+        isinstance(value, str) and len(value) == 32 and
+        all(c in string.hexdigits for c in value)
+    )
+
+class ReplayStore:
+    """Replay frames (still lzma compressed like in the .osr)
+    saved one file per replay, named after the replay's md5"""
+
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+
+        if not self.folder.exists():
+            self.folder.mkdir(exist_ok=True)
+
+        self.md5s: set[str] = {
+            name for name in os.listdir(self.folder)
+            if is_md5(name)
+        }
+
+    def __contains__(self, replay_md5: Optional[str]) -> bool:
+        return replay_md5 in self.md5s
+
+    def path(self, replay_md5: Optional[str]) -> Optional[Path]:
+        if replay_md5 not in self.md5s:
+            return
+
+        return self.folder / replay_md5 # type: ignore
+
+    def get(self, replay_md5: Optional[str]) -> Optional[bytes]:
+        if not (path := self.path(replay_md5)):
+            return
+
+        return path.read_bytes()
+
+    def put(
+        self, replay_md5: Optional[str],
+        frames: Union[bytes, memoryview]
+    ) -> bool:
+        """Saves the frames, `False` if `replay_md5` can't be used as a name"""
+        if not is_md5(replay_md5):
+            return False
+
+        if replay_md5 in self.md5s:
+            return True
+
+        path = self.folder / replay_md5 # type: ignore
+        tmp_path = path.with_name(f'{path.name}.tmp')
+        tmp_path.write_bytes(frames)
+        os.replace(tmp_path, path)
+
+        self.md5s.add(replay_md5) # type: ignore
+        return True
@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+import ctypes
+import struct
+import asyncio
+import ctypes.util
+from ext import glob
+from pathlib import Path
+from typing import Optional
+from typing import AsyncIterator
+
+# https://man7.org/linux/man-pages/man7/inotify.7.html
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_Q_OVERFLOW  = 0x00004000
+IN_NONBLOCK    = 0o4000
+IN_CLOEXEC     = 0o2000000
+
+# wd, mask, cookie, len (then `len` bytes of name)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+class Inotify:
+    """Tiny ctypes binding around linux's inotify"""
+
+    def __init__(self, folder: Path) -> None:
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(folder),
+            IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+    def read(self) -> Optional[list[str]]:
+        """Names of files that were fully written, `None` if events were lost"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            names.append(os.fsdecode(name))
+
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class ReplayWatcher:
+    """Watches the replay folder and yields every new replay
+    once it has been fully written, several at a time if needed"""
+
+    def __init__(
+        self, folder: Path,
+        interval: float = 0.1,
+        settle_time: float = 0.3
+    ) -> None:
+        self.folder = folder
+        self.interval = interval
+        self.settle_time = settle_time
+
+        self.seen: set[str] = set()
+        # name -> (size, time the size last changed)
+        self.pending: dict[str, tuple[int, float]] = {}
+        self.ready: asyncio.Queue[list[Path]] = asyncio.Queue()
+
+        self.inotify: Optional[Inotify] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def scan(self) -> set[str]:
+        return {
+            entry.name for entry in os.scandir(self.folder)
+            if entry.name.endswith('.osr')
+        }
+
+    def emit(self, names: list[str]) -> None:
+        names = [n for n in names if n.endswith('.osr') and n not in self.seen]
+        if not names:
+            return
+
+        self.seen.update(names)
+        paths = [self.folder / name for name in names]
+        paths.sort(key = lambda p: p.stat().st_mtime if p.exists() else 0)
+        self.ready.put_nowait(paths)
+
+    def start(self) -> None:
+        self.seen = self.scan()
+
+        if sys.platform == 'linux' and not glob.using_wsl:
+            # inotify won't see files windows writes
+            # into a mounted drive so wsl has to poll
+            try:
+                self.inotify = Inotify(self.folder)
+            except (OSError, AttributeError):
+                self.inotify = None
+
+        if self.inotify:
+            try:
+                asyncio.get_running_loop().add_reader(
+                    self.inotify.fd, self.on_inotify
+                )
+                return
+            except NotImplementedError:
+                self.inotify.close()
+                self.inotify = None
+
+        self.task = asyncio.create_task(self.poll())
+
+    def on_inotify(self) -> None:
+        names = self.inotify.read() # type: ignore
+        if names is None:
+            # queue overflowed, find out what we missed
+            names = list(self.scan() - self.seen)
+
+        self.emit(names)
+
+    async def poll(self) -> None:
+        last_changed = None
+
+        while await asyncio.sleep(self.interval, result=True):
+            try:
+                stamp = self.folder.stat().st_mtime
+            except OSError:
+                continue
+
+            # new files only change the folder's mtime, but
+            # files still being written are only in `pending`
+            if stamp != last_changed:
+                last_changed = stamp
+                for name in self.scan() - self.seen:
+                    self.pending.setdefault(name, (-1, time.monotonic()))
+
+            if self.pending:
+                self.emit(self.settled())
+
+    def settled(self) -> list[str]:
+        now = time.monotonic()
+        settled = []
+
+        for name, (size, changed) in list(self.pending.items()):
+            try:
+                current_size = (self.folder / name).stat().st_size
+            except OSError:
+                del self.pending[name]
+                continue
+
+            if current_size != size:
+                self.pending[name] = (current_size, now)
+            elif (
+                current_size > 0 and
+                now - changed >= self.settle_time
+            ):
+                del self.pending[name]
+                settled.append(name)
+
+        return settled
+
+    def stop(self) -> None:
+        if self.inotify:
+            try:
+                asyncio.get_running_loop().remove_reader(self.inotify.fd)
+            except (RuntimeError, NotImplementedError):
+                pass
+
+            self.inotify.close()
+            self.inotify = None
+
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def __aiter__(self) -> AsyncIterator[list[Path]]:
+        self.start()
+
+        try:
+            while True:
+                yield await self.ready.get()
+        finally:
+            self.stop()
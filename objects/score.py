@@ -2,18 +2,22 @@ import os
 import time
 import utils
 import calendar
-import binascii
 from ext import glob
 from typing import Any
 from typing import Union
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
+from typing import TYPE_CHECKING
 from objects.mods import Mods
 from objects.replay import Replay
 from objects.beatmap import Beatmap
+from objects.replaystore import decode_frames
 from objects.modifiedbeatmap import ModifiedBeatmap
 
+if TYPE_CHECKING:
+    from objects.leaderboard import RenderOptions
+
 BEATMAP = Union[Beatmap, ModifiedBeatmap]
 
 class BanchoScore:
@@ -42,22 +46,23 @@ class BanchoScore:
         self.bmap = bmap
         self.pp: Optional[float] = None
 
-    @property
-    def as_leaderboard_score(self) -> dict:
-        _dict = self.__dict__.copy()
-
-        _dict['score'] = (
-            f"{_dict['pp']:.0f}"
-            if glob.config.pp_leaderboard and _dict['pp'] else
-            _dict['score']
-        )
-
-        _dict = utils.delete_keys(
-            _dict, 'pp', 'bmap'
+    def leaderboard_row(
+        self, options: 'RenderOptions', num_on_lb: int,
+        personal: bool = False, name: Optional[str] = None
+    ) -> str:
+        if options.pp_leaderboard and self.pp:
+            score = f'{self.pp:.0f}'
+        else:
+            score = self.score
+
+        return (
+            f'{self.score_id}|{name or self.username}|{score}|'
+            f'{self.maxcombo}|{self.count50}|{self.count100}|'
+            f'{self.count300}|{self.countmiss}|{self.countkatu}|'
+            f'{self.countgeki}|{self.perfect}|{self.enabled_mods}|{self.user_id}|'
+            f'{num_on_lb}|{self.time}|{self.replay_available}'
         )
 
-        return _dict
-
 class Score:
     def __init__(
         self, mode: int,
@@ -72,7 +77,8 @@ class Score:
         bmap: Optional[BEATMAP] = None,
         acc: Optional[float] = None, pp: Optional[float] = None,
         replay_md5: Optional[str] = None, scoreid: Optional[int] = None,
-        replay_frames: Optional[bytes] = None, mods_str: Optional[str] = None
+        replay_frames: Optional[Union[bytes, memoryview]] = None,
+        mods_str: Optional[str] = None
     ) -> None:
         self.mode = mode
         self.md5 = md5
@@ -105,7 +111,7 @@ class Score:
 
         if (
             self.replay_frames and
-            isinstance(self.replay_frames, bytes)
+            isinstance(self.replay_frames, (bytes, memoryview))
         ):
             score['replay_frames'] = utils.bytes_to_string(
                 score['replay_frames']
@@ -139,25 +145,20 @@ class Score:
             'replay_frames' in dictionary and
             dictionary['replay_frames']
         ):
-            if "b\'" == dictionary['replay_frames'][:2]:
-                dictionary['replay_frames'] = eval(dictionary["replay_frames"])
-            else:
+            try:
+                dictionary['replay_frames'] = decode_frames(
+                    dictionary['replay_frames']
+                )
+            except ValueError:
                 if not ignore_binascii_errors:
-                    dictionary['replay_frames'] = utils.string_to_bytes(
-                        dictionary['replay_frames']
-                    )
-                else:
-                    try:
-                        dictionary['replay_frames'] = utils.string_to_bytes(
-                            dictionary['replay_frames']
-                        )
-                    except binascii.Error:
-                        pass
+                    raise
 
         return Score(**dictionary)
 
     @classmethod
     def from_replay(cls, replay: Path) -> 'Score':
+        # frames are left compressed, submitting only
+        # needs the header, lifebar and the raw frames
         parsed_replay = Replay.from_file(replay)
 
         return Score(
@@ -181,33 +182,31 @@ class Score:
             replay = parsed_replay
         )
 
-    @property
-    def as_leaderboard_score(self) -> dict:
-        if self.scoreid and self.replay_frames:
+    def leaderboard_row(
+        self, options: 'RenderOptions', num_on_lb: int,
+        personal: bool = False, name: Optional[str] = None
+    ) -> str:
+        """`personal` is the personal best above the scores,
+        only that one shows pp with `show_pp_for_personal_best`"""
+        if self.scoreid and (
+            self.replay_frames or
+            self.replay_md5 in glob.replays
+        ):
             sid = -self.scoreid
         else:
             sid = 0
 
-        pp_checks = (
-            glob.config.pp_leaderboard or 
-            glob.mode or 
-            glob.config.show_pp_for_personal_best
+        show_pp = (
+            options.pp_leaderboard or
+            options.mode or
+            (personal and options.show_pp_for_personal_best)
         )
 
-        return {
-            'score_id': sid,
-            'username': self.name,
-            'score': int(self.pp or 0) if pp_checks else self.score,
-            'maxcombo': self.max_combo,
-            'count50': self.n50,
-            'count100': self.n100,
-            'count300': self.n300,
-            'countmiss': self.nmiss,
-            'countkatu': self.nkatu,
-            'countgeki': self.ngeki,
-            'perfect': int(self.perfect),
-            'enabled_mods': self.mods,
-            'user_id': 2,
-            'time': self.time,
-            'replay_available': 1 if sid != 0 else 0
-        }
\ No newline at end of file
+        return (
+            f'{sid}|{name or self.name}|'
+            f'{int(self.pp or 0) if show_pp else self.score}|'
+            f'{self.max_combo}|{self.n50}|{self.n100}|'
+            f'{self.n300}|{self.nmiss}|{self.nkatu}|'
+            f'{self.ngeki}|{int(self.perfect)}|{self.mods}|2|'
+            f'{num_on_lb}|{self.time}|{1 if sid != 0 else 0}'
+        )
\ No newline at end of file
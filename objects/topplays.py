@@ -0,0 +1,123 @@
+import bisect
+import itertools
+from ext import glob
+from typing import Optional
+from typing import Container
+from objects.mods import Mods
+
+ACCEPTED_PLAYS = ('ranked_plays', 'approved_plays')
+
+class TopPlays:
+    """Best play of every map for one mode of a profile, sorted by pp"""
+
+    def __init__(self, filter_mod: Optional[Mods] = None) -> None:
+        self.filter_mod = filter_mod
+
+        # (-pp, order) and the play, both sorted best first
+        self.keys: list[tuple[float, int]] = []
+        self.plays: list[dict] = []
+
+        self.best: dict[str, tuple[float, int]] = {}
+        self.counts: dict[str, int] = {}
+        self.total = 0
+        self.order = itertools.count()
+
+    def accepts(self, play: dict) -> bool:
+        if self.filter_mod:
+            return bool(play['mods'] & self.filter_mod)
+
+        return not play['mods'] & (Mods.RELAX | Mods.AUTOPILOT)
+
+    def add(self, play: dict) -> None:
+        if not self.accepts(play):
+            return
+
+        md5 = play['md5']
+        self.counts[md5] = self.counts.get(md5, 0) + 1
+        self.total += 1
+
+        key = (-play['pp'], next(self.order))
+        if md5 in self.best:
+            if key >= self.best[md5]:
+                return
+
+            idx = bisect.bisect_left(self.keys, self.best[md5])
+            del self.keys[idx]
+            del self.plays[idx]
+
+        idx = bisect.bisect_left(self.keys, key)
+        self.keys.insert(idx, key)
+        self.plays.insert(idx, play)
+        self.best[md5] = key
+
+    def top(self, limit: int = 100, exclude: Container[str] = ()) -> list[dict]:
+        plays = []
+        for play in self.plays:
+            if play['md5'] in exclude:
+                continue
+
+            plays.append(play)
+            if len(plays) == limit:
+                break
+
+        return plays
+
+    def count(self, exclude: Container[str] = ()) -> int:
+        if not exclude:
+            return self.total
+
+        return self.total - sum(
+            n for md5, n in self.counts.items() if md5 in exclude
+        )
+
+    @classmethod
+    def from_profile(
+        cls, profile: dict,
+        filter_mod: Optional[Mods] = None
+    ) -> 'TopPlays':
+        top_plays = cls(filter_mod)
+
+        for key in ACCEPTED_PLAYS:
+            for plays in (profile['plays'][key] or {}).values():
+                for play in plays:
+                    top_plays.add(play)
+
+        return top_plays
+
+class TopPlaysIndex:
+    """`TopPlays` of every mode asked for, per profile, built on first use"""
+
+    def __init__(self) -> None:
+        # id(profile) -> (profile, {mode: top plays})
+        self.profiles: dict[int, tuple[dict, dict[int, TopPlays]]] = {}
+
+    def get(
+        self, profile: dict,
+        filter_mod: Optional[Mods] = None
+    ) -> TopPlays:
+        if id(profile) not in self.profiles:
+            # profiles that were wiped or deleted are replaced
+            current = {id(p) for p in glob.profiles.values()}
+            for profile_id in self.profiles.keys() - current:
+                del self.profiles[profile_id]
+
+            self.profiles[id(profile)] = (profile, {})
+
+        modes = self.profiles[id(profile)][1]
+        mode = int(filter_mod or 0)
+        if mode not in modes:
+            modes[mode] = TopPlays.from_profile(profile, filter_mod)
+
+        return modes[mode]
+
+    def add(self, profile: dict, play: dict) -> None:
+        """Adds a play that was just added to one of `ACCEPTED_PLAYS`"""
+        if id(profile) not in self.profiles:
+            return
+
+        for top_plays in self.profiles[id(profile)][1].values():
+            top_plays.add(play)
+
+    def clear(self) -> None:
+        """Everything gets rebuilt, for when pp changes like on recalc"""
+        self.profiles.clear()
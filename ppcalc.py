@@ -0,0 +1,159 @@
+# pp calculation that only needs pyttanko (and numpy if it's there),
+# process pool workers import this so it must stay free of side effects
+
+import math
+import pyttanko as oppai
+from typing import Union
+from typing import Callable
+from typing import Optional
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from objects.difficulty import Stars
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PP = float
+ACCURACY = float
+STATS = tuple[int, int, int, int, int, int]
+STARS = Union['Stars', oppai.diff_calc]
+
+BATCH_THRESHOLD = 4
+
+def _ppv2_numpy(
+    file: oppai.beatmap, stars: STARS,
+    mods: int, stats: list[tuple[int, ...]]
+) -> Optional[tuple[list[PP], list[ACCURACY]]]:
+    """`oppai.ppv2` over many scores with the same mods at once,
+    `None` if the results don't match what `oppai.ppv2` gives"""
+    def ppv2(n300: int, n100: int, n50: int, nmiss: int, combo: int) -> tuple:
+        return oppai.ppv2(
+            aim_stars = stars.aim, speed_stars = stars.speed,
+            bmap = file, mods = mods, n300 = n300, n100 = n100,
+            n50 = n50, nmiss = nmiss, combo = combo
+        )
+
+    nobjects = len(file.hitobjects)
+    max_combo = max(file.max_combo(), 1)
+    nspinners = nobjects - file.nsliders - file.ncircles
+    od = oppai.mods_apply(mods, ar = file.ar, od = file.od)[2]
+
+    if not nobjects:
+        return
+
+    # a full combo SS has no miss, combo or accuracy
+    # penalty so it gives back the parts that only
+    # depend on the map and the mods
+    total, aim_base, speed_base, acc_base, _ = ppv2(
+        nobjects, 0, 0, 0, max_combo
+    )
+    base = (aim_base ** 1.1 + speed_base ** 1.1 + acc_base ** 1.1) ** (1 / 1.1)
+    if not base:
+        return
+
+    multiplier = total / base
+
+    n300, n100, n50, nmiss, combo = np.array(stats, dtype = np.float64).T
+    hits = n300 + n100 + n50 + nmiss
+    points = n50 * 50 + n100 * 100 + n300 * 300
+
+    def acc_calc(hits: 'np.ndarray', points: 'np.ndarray') -> 'np.ndarray':
+        return np.divide(
+            points, hits * 300,
+            out = np.zeros_like(hits), where = hits > 0
+        )
+
+    accuracy = acc_calc(hits, points)
+
+    # scorev1 ignores sliders and spinners
+    ignored = file.nsliders + nspinners
+    real_acc = np.maximum(
+        acc_calc(hits - ignored, points - ignored * 300), 0.0
+    )
+
+    miss_base = 1 - (nmiss / nobjects) ** 0.775
+    miss_aim = np.where(nmiss > 0, 0.97 * miss_base ** nmiss, 1.0)
+    miss_speed = np.where(nmiss > 0, 0.97 * miss_base ** (nmiss ** 0.875), 1.0)
+    combo_break = combo ** 0.8 / max_combo ** 0.8
+
+    aim = aim_base * miss_aim * combo_break * (0.5 + accuracy / 2)
+    speed = (
+        speed_base * miss_speed * combo_break *
+        accuracy ** ((14.5 - max(od, 8.0)) / 2)
+    )
+    speed *= np.where(
+        n50 >= nobjects / 500,
+        0.98 ** (n50 - nobjects / 500), 1.0
+    )
+    acc = acc_base * real_acc ** 24
+
+    if mods & oppai.MODS_NF:
+        multiplier = multiplier * np.maximum(0.9, 1 - 0.2 * nmiss)
+
+    pp = (aim ** 1.1 + speed ** 1.1 + acc ** 1.1) ** (1 / 1.1) * multiplier
+    acc_percent = accuracy * 100
+
+    # make sure this is still the formula oppai uses
+    for idx in {0, int(np.argmin(pp))}:
+        real_pp, *_, real_acc_percent = ppv2(*stats[idx])
+        if not (
+            math.isclose(pp[idx], real_pp, rel_tol = 1e-9) and
+            math.isclose(acc_percent[idx], real_acc_percent, rel_tol = 1e-9)
+        ):
+            return
+
+    return (pp.tolist(), acc_percent.tolist())
+
+def ppv2_batch(
+    file: oppai.beatmap, stats: list[STATS],
+    calc_stars: Optional[Callable[[int], STARS]] = None
+) -> tuple[list[PP], list[ACCURACY]]:
+    """pp and accuracy of many (mods, n300, n100, n50, nmiss, combo)
+    on the same map, stars are calculated once per mods (with
+    `calc_stars` if given) and pp in one numpy pass per mods if
+    numpy is installed"""
+    groups: dict[int, list[int]] = {}
+    for idx, (mods, *_) in enumerate(stats):
+        groups.setdefault(mods, []).append(idx)
+
+    pps: list[PP] = [0.0] * len(stats)
+    accs: list[ACCURACY] = [0.0] * len(stats)
+
+    for mods, indexes in groups.items():
+        if calc_stars:
+            stars = calc_stars(mods)
+        else:
+            stars = oppai.diff_calc().calc(file, mods)
+
+        group_stats = [stats[idx][1:] for idx in indexes]
+
+        results = None
+        if np and len(indexes) >= BATCH_THRESHOLD:
+            results = _ppv2_numpy(file, stars, mods, group_stats)
+
+        if not results:
+            results = ([], [])
+            for n300, n100, n50, nmiss, combo in group_stats:
+                pp, *_, acc_percent = oppai.ppv2(
+                    aim_stars = stars.aim,
+                    speed_stars = stars.speed,
+                    bmap = file, mods = mods,
+                    n300 = n300, n100 = n100, n50 = n50,
+                    nmiss = nmiss, combo = combo
+                )
+                results[0].append(pp)
+                results[1].append(acc_percent)
+
+        for idx, pp, acc_percent in zip(indexes, *results):
+            pps[idx] = pp
+            accs[idx] = acc_percent
+
+    return (pps, accs)
+
+def calc_map(osu_file: str, stats: list[STATS]) -> tuple[list[PP], list[ACCURACY]]:
+    """Runs in the recalculation process pool so it only gets plain data"""
+    bmap = oppai.parser().map(osu_file = osu_file.splitlines())
+    return ppv2_batch(bmap, stats)
@@ -1,6 +1,6 @@
 from typing import Union
 
-def init_profile(name: str) -> dict[str, Union[int, list[str], dict]]:
+def init_profile(name: str) -> dict[str, Union[int, set[str], dict]]:
     return {
         name: {
             'pp': 0,
@@ -12,7 +12,7 @@ def init_profile(name: str) -> dict[str, Union[int, list[str], dict]]:
                 'qualified_plays': {},
                 'approved_plays': {},
                 'all_plays': [],
-                'replay_md5': []
+                'replay_md5': set()
             }
         }
     }
\ No newline at end of file
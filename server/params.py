@@ -1,7 +1,9 @@
+import inspect
 from typing import Any
 from typing import Callable
 from typing import Optional
 from typing import Iterator
+from server.request import Request
 
 class Alias:
     def __init__(
@@ -30,4 +32,68 @@ class Query:
             self.alias: list[str] = []
     
     def __call__(self, value: Any) -> Any:
-        return self.query(value)
\ No newline at end of file
+        return self.query(value)
+
+class Binder:
+    """Everything needed to turn a request into a handler's
+    keyword arguments, worked out once from its signature"""
+
+    def __init__(self, func: Callable) -> None:
+        self.requests: list[str] = []
+        self.params: list[tuple[
+            str, tuple[str, ...],
+            Optional[Callable], Optional[type]
+        ]] = []
+
+        for name, param in inspect.signature(func).parameters.items():
+            default = param.default
+
+            if isinstance(default, Request):
+                self.requests.append(name)
+                continue
+
+            names: tuple[str, ...] = (name,)
+            converter: Optional[Callable] = None
+            if isinstance(default, (Query, Alias)):
+                names += tuple(default.alias)
+
+                if isinstance(default, Query):
+                    converter = default.query
+
+            annotation = param.annotation
+            if not isinstance(annotation, type):
+                annotation = None
+
+            self.params.append((name, names, converter, annotation))
+
+    def bind(self, request: Request) -> dict[str, Any]:
+        # request.args beats request.params which beats the
+        # request's own attributes (path, method, headers...)
+        sources = (request.args, request.params, request.__dict__)
+
+        bound: dict[str, Any] = {}
+        for name in self.requests:
+            bound[name] = request
+
+        for name, names, converter, annotation in self.params:
+            for source in sources:
+                for key in names:
+                    if key in source:
+                        break
+                else:
+                    continue
+
+                value = source[key]
+                break
+            else:
+                continue
+
+            if converter:
+                value = converter(value)
+
+            if annotation and not isinstance(value, annotation):
+                value = annotation(value)
+
+            bound[name] = value
+
+        return bound
\ No newline at end of file
@@ -0,0 +1,47 @@
+from typing import Any
+from typing import Optional
+
+class Request:
+    def __init__(self) -> None:
+        self.content_length: int
+        self.method: str
+        self.path: str
+        self.params: dict[str, Any]
+        self.http_version: float
+        self.content_type: str
+        self.raw_body: memoryview
+        self.boundary: str
+        self.multipart: Optional[dict[str, Any]]
+        self.args: dict[str, Any]
+        self.host: str
+    
+    def __contains__(self, item: Any) -> bool:
+        return self.__dict__.__contains__(item)
+    
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Request':
+        req = cls()
+        req.__dict__.update(data)
+        return req
+    
+    def __repr__(self) -> str:
+        return self.path
+    
+    @property
+    def as_url(self) -> str:
+        if (
+            ':' in self.host or
+            self.host == 'localhost'
+        ):
+            url = f'http://{self.host}{self.path}'
+        else:
+            url = f'https://{self.host}{self.path}'
+        
+        params_str = '&'.join([
+            f'{k}={v}' for k, v in self.params.items()
+        ])
+
+        if params_str:
+            return f'{url}?{params_str}'
+        else:
+            return url
\ No newline at end of file
@@ -21,21 +21,23 @@ class Response:
         self.body = body
         self.headers = headers
 
-    def to_bytes(self) -> bytes:
-        if isinstance(self.body, str):
-            self.body = self.body.encode()
-              
+    def head(self, length: int) -> bytearray:
         resp = bytearray((
             f'HTTP/1.1 {self.code} {HTTP_STATUS_CODES[self.code]}\r\n'
-            f'Content-Length: {len(self.body)}\r\n'
+            f'Content-Length: {length}\r\n'
         ).encode())
 
         for key, value in self.headers.items():
             resp += f'{key}: {value}\r\n'.encode()
 
         resp += b'\r\n'
-        
-        return bytes(resp + self.body)
+        return resp
+
+    def to_bytes(self) -> bytes:
+        if isinstance(self.body, str):
+            self.body = self.body.encode()
+
+        return bytes(self.head(len(self.body)) + self.body)
     
 class HTMLResponse(Response):
     def __init__(self, path: Union[str, Path], **kwargs) -> None:
@@ -81,14 +83,27 @@ class SuccessJsonResponse(JsonResponse):
     def __init__(self, json: dict) -> None:
         super().__init__(200, json)
 
+class FileResponse(Response):
+    """Sent straight from disk by the server instead of read into memory"""
+    def __init__(
+        self, path: Path,
+        headers: dict[str, Any] = {}
+    ) -> None:
+        super().__init__(code = 200, headers = headers)
+        self.path = path
+
+    def to_bytes(self) -> bytes:
+        body = self.path.read_bytes()
+        return bytes(self.head(len(body)) + body)
+
 ALL_RESPONSES = (
     Response, HTMLResponse, 
     ImageResponse, JsonResponse,
-    SuccessJsonResponse
+    SuccessJsonResponse, FileResponse
 )    
 
 All_Responses = Union[
     Response, HTMLResponse, 
     ImageResponse, JsonResponse,
-    SuccessJsonResponse
+    SuccessJsonResponse, FileResponse
 ]
\ No newline at end of file
@@ -2,8 +2,10 @@ import re
 from typing import Any
 from typing import Union
 from typing import Iterator
+from typing import Optional
 from typing import Callable
 from typing import Coroutine
+from server.params import Binder
 from server.responses import All_Responses
 
 responses = Union[bytearray, bytes, str, All_Responses]
@@ -21,6 +23,7 @@ class Route:
         self.methods = methods
         self.handler = handler
         self.origin = origin
+        self.binder = Binder(handler)
     
     def match(self, request_path: str) -> Union[bool, dict[str, str]]:
         if isinstance(self.path, str):
@@ -69,4 +72,134 @@ class Router:
         return iter(self.routes)
     
     def __repr__(self) -> str:
-        return str(self.main_destination)
\ No newline at end of file
+        return str(self.main_destination)
+
+GROUP_NAME = re.compile(r'\(\?P(<|=)([a-zA-Z_][a-zA-Z0-9_]*)')
+GLOBAL_FLAGS = re.compile(r'^\(\?[aiLmsux]+\)')
+SCOPED_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+
+class RouteTable:
+    """All routes of every router compiled into one lookup,
+    exact paths are a single dict lookup and every regex
+    route is tried at once through one combined pattern"""
+
+    def __init__(self, routers: list[Router]) -> None:
+        self.static: dict[tuple[str, str], Route] = {}
+        self.patterns: dict[str, re.Pattern] = {}
+        self.pattern_routes: dict[str, Route] = {}
+        self.group_names: dict[str, dict[str, str]] = {}
+
+        # (method, full path, route) for exact paths and
+        # (method, alternative, route) for regex routes
+        # in the order the old linear scan would try them
+        statics: list[tuple[int, str, str, Route]] = []
+        alternatives: dict[str, list[tuple[int, str]]] = {}
+
+        order = 0
+        for router in routers:
+            if isinstance(router.main_destination, str):
+                prefixes = (router.main_destination,)
+            else:
+                prefixes = router.main_destination
+
+            for route in router:
+                order += 1
+                for prefix_index, prefix in enumerate(prefixes):
+                    if isinstance(route.path, str):
+                        full_path = prefix + route.path
+
+                        # the router would strip a longer prefix
+                        # off this path so it can't end up here
+                        if router.match(full_path) not in (True, prefix):
+                            continue
+
+                        for method in route.methods:
+                            statics.append((order, method, full_path, route))
+
+                        continue
+
+                    name = f'_r{order}p{prefix_index}'
+                    alternative = self.alternative(
+                        name, router, prefix, route.path
+                    )
+                    self.pattern_routes[name] = route
+                    for method in route.methods:
+                        alternatives.setdefault(method, []).append(
+                            (order, alternative)
+                        )
+
+        for method, method_alternatives in alternatives.items():
+            self.patterns[method] = re.compile('|'.join(
+                alternative for _, alternative in method_alternatives
+            ))
+
+        for order, method, full_path, route in statics:
+            # a regex route that comes before this one
+            # would've matched the path first
+            if (match := self.match_pattern(method, full_path)):
+                if self.order(match.lastgroup) < order: # type: ignore
+                    continue
+
+            self.static.setdefault((method, full_path), route)
+
+    @staticmethod
+    def order(name: str) -> int:
+        return int(name.removeprefix('_r').split('p', 1)[0])
+
+    def alternative(
+        self, name: str, router: Router,
+        prefix: str, pattern: re.Pattern
+    ) -> str:
+        source = GLOBAL_FLAGS.sub('', pattern.pattern)
+
+        names = self.group_names[name] = {}
+        def rename(m: re.Match) -> str:
+            names[f'{name}_{m[2]}'] = m[2]
+            return f'(?P{m[1]}{name}_{m[2]}'
+
+        source = GROUP_NAME.sub(rename, source)
+
+        flags = ''.join(
+            flag for value, flag in SCOPED_FLAGS.items()
+            if pattern.flags & value
+        )
+        if flags:
+            source = f'(?{flags}:{source})'
+
+        # the router always picks the longest prefix that
+        # fits, so shorter ones can't match those paths
+        longer = ''.join(
+            f'(?!{re.escape(other)})'
+            for other in router.main_destination
+            if (
+                isinstance(router.main_destination, tuple) and
+                other != prefix and
+                other.startswith(prefix)
+            )
+        )
+
+        return f'(?P<{name}>{longer}{re.escape(prefix)}(?:{source}))'
+
+    def match_pattern(
+        self, method: str, path: str
+    ) -> Optional[re.Match]:
+        if method not in self.patterns:
+            return
+
+        return self.patterns[method].match(path)
+
+    def match(
+        self, method: str, path: str
+    ) -> Optional[tuple[Route, dict[str, str]]]:
+        if (route := self.static.get((method, path))):
+            return (route, {})
+
+        if not (match := self.match_pattern(method, path)):
+            return
+
+        name: str = match.lastgroup # type: ignore
+        args = {
+            original: match[renamed]
+            for renamed, original in self.group_names[name].items()
+        }
+        return (self.pattern_routes[name], args)
@@ -1,62 +1,21 @@
+import os
 import socket
-import inspect
 import asyncio
+from server import params
 from typing import Any
+from typing import Union
 from typing import Callable
 from typing import Optional
 from typing import Coroutine
 from server.router import Router
+from server.router import RouteTable
+from server.request import Request
 from asyncio import AbstractEventLoop
 from server.responses import Response
 from server.responses import JsonResponse
+from server.responses import FileResponse
 from server.responses import ALL_RESPONSES
-
-class Request:
-    def __init__(self) -> None:
-        self.content_length: int
-        self.method: str
-        self.path: str
-        self.params: dict[str, Any]
-        self.http_version: float
-        self.content_type: str
-        self.raw_body: bytes
-        self.boundary: str
-        self.multipart: Optional[dict[str, Any]]
-        self.args: dict[str, Any]
-        self.host: str
-    
-    def __contains__(self, item: Any) -> bool:
-        return self.__dict__.__contains__(item)
-    
-    @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> 'Request':
-        req = cls()
-        req.__dict__.update(data)
-        return req
-    
-    def __repr__(self) -> str:
-        return self.path
-    
-    @property
-    def as_url(self) -> str:
-        if (
-            ':' in self.host or
-            self.host == 'localhost'
-        ):
-            url = f'http://{self.host}{self.path}'
-        else:
-            url = f'https://{self.host}{self.path}'
-        
-        params_str = '&'.join([
-            f'{k}={v}' for k, v in self.params.items()
-        ])
-
-        if params_str:
-            return f'{url}?{params_str}'
-        else:
-            return url
-
-from server import params
+from server.responses import HTTP_STATUS_CODES
 
 def Alias(
     *alias: str
@@ -75,61 +34,37 @@ def Query(
 
 PARAMS = (params.Query, params.Alias)
 
+MAX_LINE_SIZE = 1024
+
+class RequestError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(code)
+        self.code = code
+
 class HTTPServer:
     def __init__(
         self, 
-        loop: AbstractEventLoop = asyncio.get_event_loop()
+        loop: AbstractEventLoop = asyncio.get_event_loop(),
+        keep_alive_timeout: float = 15.0,
+        max_header_size: int = 16 * 1024,
+        max_body_size: int = 32 * 1024 * 1024
     ) -> None:
         self.loop = loop
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
         self.routers: list[Router] = []
+        self.route_table: Optional[RouteTable] = None
         self.start_method: Optional[Coroutine] = None
         self.shutdown_method: Optional[Coroutine] = None
 
     def add_router(self, router: Router) -> None:
         self.routers.append(router)
+        self.route_table = None
 
-    def parse_args(
-        self, 
-        args: dict[str, Any],
-        func: Callable, 
-        request: Optional[Request] = None
-    ) -> dict[str, Any]:
-        
-        signature = inspect.signature(func)
-
-        parsed_args = {}
-        if not signature.parameters or not args:
-            return parsed_args
-
-        parameter_keys = args.keys()
-        for arg_name, func_arg in signature.parameters.items():
-            arg_names = [arg_name]
-            default_value = func_arg.default
-
-            if isinstance(default_value, Request) and request:
-                parsed_args[arg_name] = request
-                continue
-
-            is_param = isinstance(default_value, PARAMS)
-            if is_param:
-                arg_names.extend(default_value.alias)
-
-            parameter_key_check = [key for key in parameter_keys if key in arg_names]
-            if not parameter_key_check:
-                continue
-            
-            arg_key, = parameter_key_check
-            parameter_value = args[arg_key]
-
-            if is_param:
-                parameter_value = default_value(parameter_value)
-            
-            if not isinstance(parameter_value, func_arg.annotation):
-                parameter_value = func_arg.annotation(parameter_value)
-            
-            parsed_args[arg_name] = parameter_value
-        
-        return parsed_args
+    def compile_routes(self) -> RouteTable:
+        self.route_table = RouteTable(self.routers)
+        return self.route_table
 
     def starting(self, func: Callable) -> Callable:
         self.start_method = func()
@@ -178,7 +113,7 @@ class HTTPServer:
     
         return headers
 
-    def parse_body(self, request: Request, body: bytes) -> Request:
+    def parse_body(self, request: Request, body: memoryview) -> Request:
         if (
             'content_type' in request and
             request.method == 'POST'
@@ -192,103 +127,237 @@ class HTTPServer:
         
         return request
 
-    def parse(self, content: bytes) -> Request:
-        request = {}
-        split = content.split(b'\r\n\r\n', 1)
-        len_split = len(split)
+    def keep_alive(self, request: Request) -> bool:
+        connection = str(request.__dict__.get('connection', '')).lower()
 
-        if len_split == 0:
-            return Request()
-        if len_split == 1:
-            request |= self.parse_headers(split[0])
-            return Request.from_dict(request)
-        
-        headers, body = split
-        request |= self.parse_headers(headers)
-        request = self.parse_body(Request.from_dict(request), body)
+        if request.http_version < 1.1:
+            return connection == 'keep-alive'
 
-        return request
+        return connection != 'close'
 
-    async def handle_con(
-        self, client: socket.socket
-    ) -> None:
-        data = await self.loop.sock_recv(client, 1024)
+    async def recv(self, client: socket.socket, buffer: bytearray) -> None:
+        data = await asyncio.wait_for(
+            self.loop.sock_recv(client, 65536),
+            timeout = self.keep_alive_timeout
+        )
         if not data:
-            await self.loop.sock_sendall(client, b'')
-            client.close()
+            raise ConnectionResetError
+
+        buffer += data
+
+    async def fill(
+        self, client: socket.socket, 
+        buffer: bytearray, size: int
+    ) -> None:
+        """Reads straight into `buffer` until it is `size` bytes long"""
+        if (received := len(buffer)) >= size:
             return
+
+        buffer.extend(bytes(size - received))
+        with memoryview(buffer) as view:
+            while received < size:
+                read = await asyncio.wait_for(
+                    self.loop.sock_recv_into(client, view[received:]),
+                    timeout = self.keep_alive_timeout
+                )
+                if not read:
+                    break
+
+                received += read
+
+        if received < size:
+            del buffer[received:]
+            raise ConnectionResetError
+
+    async def read_until(
+        self, client: socket.socket, 
+        buffer: bytearray, separator: bytes, 
+        start: int, limit: int, error_code: int = 400
+    ) -> int:
+        """Returns the index of `separator` in `buffer` after `start`"""
+        searched = start
+        while (index := buffer.find(separator, searched)) == -1:
+            if len(buffer) - start > limit:
+                raise RequestError(error_code)
+
+            # only look at new data next time, the separator
+            # could still be split between two reads though
+            searched = max(start, len(buffer) - len(separator) + 1)
+            await self.recv(client, buffer)
+
+        return index
+
+    async def read_chunked(
+        self, client: socket.socket, 
+        buffer: bytearray, start: int
+    ) -> tuple[bytearray, int]:
+        body = bytearray()
         
-        request = self.parse(data)
+        while True:
+            line_end = await self.read_until(
+                client, buffer, b'\r\n', start, MAX_LINE_SIZE
+            )
+
+            try:
+                size = int(bytes(buffer[start:line_end]).split(b';', 1)[0], 16)
+            except ValueError:
+                raise RequestError(400)
+
+            start = line_end + 2
+            if size == 0:
+                break
+
+            if len(body) + size > self.max_body_size:
+                raise RequestError(413)
+
+            await self.fill(client, buffer, start + size + 2)
+            with memoryview(buffer) as view:
+                body += view[start:start + size]
+            
+            start += size + 2
+
+        # skip any trailers, the body ends on an empty line
+        while (
+            line_end := await self.read_until(
+                client, buffer, b'\r\n', start, MAX_LINE_SIZE
+            )
+        ) != start:
+            start = line_end + 2
+
+        return (body, start + 2)
+
+    async def read_request(
+        self, client: socket.socket, buffer: bytearray
+    ) -> tuple[Optional[Request], bytearray]:
+        try:
+            header_end = await self.read_until(
+                client, buffer, b'\r\n\r\n', 0,
+                self.max_header_size, error_code = 431
+            )
+        except ConnectionResetError:
+            return (None, buffer)
+
+        try:
+            request = Request.from_dict(
+                self.parse_headers(bytes(buffer[:header_end]))
+            )
+        except ValueError:
+            raise RequestError(400)
+
+        body_start = header_end + 4
+
+        if (
+            'transfer_encoding' in request and
+            'chunked' in str(request.transfer_encoding).lower()
+        ):
+            body, body_end = await self.read_chunked(client, buffer, body_start)
+            request = self.parse_body(request, memoryview(body))
+            return (request, buffer[body_end:])
+
+        length = 0
         if 'content_length' in request:
             length = request.content_length
-            if length > 1024:
-                data += await self.loop.sock_recv(client, length)
-                request = self.parse(data)
-        
-        for router in self.routers:
-            if not (match := router.match(request.path)):
-                continue
-            
-            if isinstance(match, str):
-                path = request.path.removeprefix(match)
+
+        if not isinstance(length, int) or length < 0:
+            raise RequestError(400)
+
+        if length > self.max_body_size:
+            raise RequestError(413)
+
+        body_end = body_start + length
+        await self.fill(client, buffer, body_end)
+
+        # the body stays a view into the buffer it was read into,
+        # anything after it belongs to the next pipelined request
+        # so only that gets copied into a fresh buffer
+        request = self.parse_body(
+            request, memoryview(buffer)[body_start:body_end]
+        )
+        return (request, buffer[body_end:])
+
+    async def handle_request(
+        self, request: Request
+    ) -> Union[bytes, FileResponse]:
+        route_table = self.route_table or self.compile_routes()
+
+        if (match := route_table.match(request.method, request.path)):
+            route, request.args = match
+
+            resp = await route.handler(**route.binder.bind(request))
+
+            if isinstance(resp, FileResponse):
+                return resp
+            elif isinstance(resp, ALL_RESPONSES):
+                return resp.to_bytes()
+            elif isinstance(resp, bytearray):
+                return Response(bytes(resp)).to_bytes()
+            elif isinstance(resp, str):
+                return Response(resp.encode()).to_bytes()
+            elif isinstance(resp, bytes):
+                return resp
             else:
-                path = request.path.removeprefix(router.main_destination) # type: ignore
-            
-            for route in router:
-                if request.method not in route.methods:
-                    continue
-
-                match = route.match(path)
-                if match is False:
-                    continue
-                
-                if isinstance(match, dict):
-                    request.args = match
-                else:
-                    request.args = {}
+                try:
+                    return Response(bytes(resp)).to_bytes()
+                except:
+                    raise Exception(f'unknown type for resp, type: {type(resp)}')
 
-                all_possible_parameters = request.__dict__
-                all_possible_parameters |= request.params
-                all_possible_parameters |= request.args
+        print(request.path, request.params, request.method)
+        return JsonResponse(404, {'error': 'not found'}).to_bytes()
 
-                route_handler = route.handler
-                resp = await route_handler(**self.parse_args(
-                    all_possible_parameters, route_handler, request
-                ))
+    async def send_file(
+        self, client: socket.socket,
+        response: FileResponse
+    ) -> None:
+        with open(response.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            await self.loop.sock_sendall(client, response.head(size))
 
-                if isinstance(resp, ALL_RESPONSES):
-                    await self.loop.sock_sendall(
-                        client, resp.to_bytes()
-                    )
-                elif isinstance(resp, bytearray):
-                    await self.loop.sock_sendall(
-                        client, Response(bytes(resp)).to_bytes()
-                    )
-                elif isinstance(resp, str):
-                    await self.loop.sock_sendall(
-                        client, Response(resp.encode()).to_bytes()
-                    )
-                elif isinstance(resp, bytes):
+            try:
+                await self.loop.sock_sendfile(client, f)
+            except (NotImplementedError, AttributeError):
+                # loops like uvloop might not have sendfile
+                while (chunk := f.read(64 * 1024)):
+                    await self.loop.sock_sendall(client, chunk)
+
+    async def handle_con(
+        self, client: socket.socket
+    ) -> None:
+        buffer = bytearray()
+
+        try:
+            # keep serving the same connection until the client
+            # asks us to close it or goes quiet for too long,
+            # requests are handled one by one so pipelined
+            # requests get their responses back in order
+            while True:
+                try:
+                    request, buffer = await self.read_request(client, buffer)
+                except asyncio.TimeoutError:
+                    break
+                except RequestError as e:
                     await self.loop.sock_sendall(
-                        client, resp
+                        client, JsonResponse(e.code, {
+                            'error': HTTP_STATUS_CODES[e.code].lower()
+                        }).to_bytes()
                     )
+                    break
+
+                if not request:
+                    await self.loop.sock_sendall(client, b'')
+                    break
+
+                response = await self.handle_request(request)
+                if isinstance(response, FileResponse):
+                    await self.send_file(client, response)
                 else:
-                    try:
-                        await self.loop.sock_sendall(
-                            client, Response(bytes(resp)).to_bytes()
-                        )
-                    except:
-                        raise Exception(f'unknown type for resp, type: {type(resp)}')
-                
-                client.close()
-                return
+                    await self.loop.sock_sendall(client, response)
 
-        print(request.path, request.params, request.method)
-        await self.loop.sock_sendall(
-            client, JsonResponse(404, {'error': 'not found'}).to_bytes()
-        )
-        client.close()
-        return
+                if not self.keep_alive(request):
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            client.close()
 
     async def _run(
         self, 
@@ -325,6 +394,8 @@ class HTTPServer:
         listening: int = 16,
         background_tasks: Optional[list[Callable]] = None
     ) -> None:
+        self.compile_routes()
+
         try:
             self.loop.run_until_complete(self._run(
                 bind, listening, background_tasks
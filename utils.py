@@ -1,4 +1,5 @@
 import base64
+import ppcalc
 import orjson
 import asyncio
 import hashlib
@@ -19,6 +20,7 @@ if TYPE_CHECKING:
     from objects import Beatmap
     from objects import BanchoScore
     from objects import ModifiedBeatmap
+    from objects.difficulty import Stars
 
 try:
     import packets
@@ -39,17 +41,25 @@ ACCURACY = float
 SCORE = Union['Score', 'BanchoScore']
 def calculator(
     score: SCORE, bmap: Union['Beatmap', 'ModifiedBeatmap', oppai.beatmap],
-    stars: Optional[oppai.diff_calc] = None
+    stars: Optional[Union['Stars', oppai.diff_calc]] = None
 ) -> tuple[PP, ACCURACY]:
     """PP calculator (easy to work with and change whenever needed)"""
     if not isinstance(bmap, oppai.beatmap):
         file = bmap.map_file
+        md5 = bmap.file_md5
     else:
         file = bmap
+        md5 = None
+
+    def calc_stars(mods: int) -> Union['Stars', oppai.diff_calc]:
+        if md5:
+            return glob.difficulty.calc(md5, file, mods)
+
+        return oppai.diff_calc().calc(file, mods)
 
     if 'BanchoScore' not in str(type(score)): # avoids merge conflicts
         if not stars:
-            stars = oppai.diff_calc().calc(file, score.mods) # type: ignore
+            stars = calc_stars(score.mods) # type: ignore
 
         pp, *_, acc_percent = oppai.ppv2(
             aim_stars = stars.aim,
@@ -65,7 +75,7 @@ def calculator(
     else:
         mods = int(score.enabled_mods) # type: ignore
         if not stars:
-            stars = oppai.diff_calc().calc(file, mods)
+            stars = calc_stars(mods)
 
         pp, *_, acc_percent = oppai.ppv2(
             aim_stars = stars.aim,
@@ -83,6 +93,43 @@ def calculator(
 
     return (pp, acc_percent)
 
+def score_stats(score: SCORE) -> tuple[int, int, int, int, int, int]:
+    """mods, n300, n100, n50, nmiss and combo of either kind of score"""
+    if 'BanchoScore' not in str(type(score)):
+        return (
+            int(score.mods), score.n300, score.n100, # type: ignore
+            score.n50, score.nmiss, score.max_combo # type: ignore
+        )
+
+    return (
+        int(score.enabled_mods), int(score.count300), # type: ignore
+        int(score.count100), int(score.count50), # type: ignore
+        int(score.countmiss), int(score.maxcombo) # type: ignore
+    )
+
+def calculator_batch(
+    bmap: Union['Beatmap', 'ModifiedBeatmap', oppai.beatmap],
+    scores: list[SCORE]
+) -> tuple[list[PP], list[ACCURACY]]:
+    """`calculator` for many scores of the same map, results line up with `scores`"""
+    if not scores:
+        return ([], [])
+
+    stats = [score_stats(s) for s in scores]
+    if not isinstance(bmap, oppai.beatmap):
+        file, md5 = bmap.map_file, bmap.file_md5
+        pps, accs = ppcalc.ppv2_batch(
+            file, stats, lambda mods: glob.difficulty.calc(md5, file, mods)
+        )
+    else:
+        pps, accs = ppcalc.ppv2_batch(bmap, stats)
+
+    for score, pp in zip(scores, pps):
+        if 'BanchoScore' in str(type(score)):
+            score.pp = pp
+
+    return (pps, accs)
+
 def is_path(p: str) -> Union[Path, Literal[False]]:
     path = Path(p)
 
@@ -96,6 +143,7 @@ def update_files() -> None:
     glob.beatmaps.update_file()
     glob.profiles.update_file()
     glob.json_config.update_file()
+    glob.difficulty.update_file()
     glob.modified_beatmaps.update_file()
 
 async def _add_to_player_queue(packets: bytes) -> None:
@@ -108,6 +156,22 @@ def add_to_player_queue(packets: bytes) -> None:
     """Safe way to add to a player's queue"""
     asyncio.create_task(_add_to_player_queue(packets))
 
+def get_play(profile: dict, scoreid: int) -> Optional[dict]:
+    """Play of `profile` with `scoreid`, which is its place in `all_plays`"""
+    all_plays: list[dict] = profile['plays']['all_plays']
+
+    if 0 < scoreid <= len(all_plays):
+        play = all_plays[scoreid - 1]
+        if play.get('scoreid', scoreid) == scoreid:
+            return play
+
+    # only if `all_plays` is out of order or has gaps
+    for play in all_plays:
+        if play.get('scoreid') == scoreid:
+            return play
+
+    return
+
 def filter_top_scores(_scores: list[dict]) -> list[dict]:
     """Removes duplicated scores"""
     md5s = []
@@ -6,6 +6,7 @@ version = '1.6.3'
 file_structure = ['.gitignore',
  'commands.py',
  'constants.py',
+ 'database.py',
  'ext/glob.py',
  'handlers/api.py',
  'handlers/ava.py',
@@ -14,29 +15,41 @@ file_structure = ['.gitignore',
  'handlers/web.py',
  'handlers/__init__.py',
  'main.py',
+ 'objects/apiclient.py',
  'objects/beatmap.py',
+ 'objects/beatmapcache.py',
  'objects/command.py',
+ 'objects/difficulty.py',
  'objects/directresponse.py',
  'objects/file.py',
  'objects/jsonfile.py',
  'objects/leaderboard.py',
+ 'objects/leaderboardcache.py',
  'objects/leaderboardtypes.py',
  'objects/modifiedbeatmap.py',
  'objects/modifiedfinder.py',
  'objects/modifiedleaberboard.py',
  'objects/mods.py',
+ 'objects/osucache.py',
+ 'objects/personalbests.py',
  'objects/player.py',
+ 'objects/recalculator.py',
  'objects/replay.py',
+ 'objects/replaystore.py',
+ 'objects/replaywatcher.py',
  'objects/score.py',
+ 'objects/topplays.py',
  'objects/__init__.py',
  'objects/config.py',
  'packets.py',
+ 'ppcalc.py',
  'queries.py',
  'README.md',
  'regex.py',
  'requirements.txt',
  'sample.config.py',
  'server/params.py',
+ 'server/request.py',
  'server/responses.py',
  'server/router.py',
  'server/server.py',